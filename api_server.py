@@ -17,7 +17,11 @@ def setup_environment():
 
 
 def main():
-    """主入口函数."""
+    """主入口函数.
+
+    多核部署时可改用 gunicorn 托管多个 worker:
+    gunicorn -k uvicorn.workers.UvicornWorker -w 4 -b 0.0.0.0:8000 mini_agent.web.server:app
+    """
     setup_environment()
     
     import uvicorn
@@ -40,6 +44,10 @@ def main():
         port=8000,
         reload=False,
         log_level="info",
+        # 安装 uvicorn[standard] 后自动使用 uvloop + httptools, Windows 等平台回退到 asyncio + h11
+        loop="auto",
+        http="auto",
+        access_log=False,
     )
 
 
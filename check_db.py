@@ -1,37 +1,59 @@
 import sqlite3
 import json
 
-conn = sqlite3.connect('data/mini_agent.db')
+# Read-only connection: skips write-lock bookkeeping for this inspection script
+conn = sqlite3.connect('file:data/mini_agent.db?mode=ro', uri=True)
+conn.executescript(
+    "PRAGMA mmap_size=268435456;"
+    "PRAGMA cache_size=-65536;"
+    "PRAGMA temp_store=MEMORY;"
+)
+conn.row_factory = sqlite3.Row
 cursor = conn.cursor()
 
-cursor.execute('SELECT session_id, messages FROM sessions ORDER BY updated_at DESC LIMIT 3')
+# Let SQLite pull the needed fields out of the messages JSON instead of
+# parsing every full history in Python
+cursor.execute('''
+    SELECT
+        session_id,
+        json_array_length(messages) AS message_count,
+        json_extract(messages, '$[#-1].role') AS last_role,
+        CASE json_type(messages, '$[#-1].content')
+            WHEN 'text' THEN length(json_extract(messages, '$[#-1].content'))
+            WHEN 'array' THEN json_array_length(messages, '$[#-1].content')
+            ELSE 0
+        END AS last_content_length,
+        json_extract(messages, '$[#-1].thinking') AS last_thinking,
+        json_extract(messages, '$[#-1].blocks') AS last_blocks,
+        (SELECT json_group_array(key) FROM json_each(messages, '$[#-1]')) AS last_keys
+    FROM sessions
+    ORDER BY updated_at DESC
+    LIMIT 3
+''')
 rows = cursor.fetchall()
 
 for r in rows:
-    session_id = r[0]
-    messages = json.loads(r[1])
     print(f"\n{'='*60}")
-    print(f"Session: {session_id}")
-    print(f"Messages count: {len(messages)}")
+    print(f"Session: {r['session_id']}")
+    print(f"Messages count: {r['message_count']}")
     
-    if messages:
-        last_msg = messages[-1]
-        print(f"Last message role: {last_msg.get('role')}")
-        print(f"Last message content length: {len(last_msg.get('content', ''))}")
-        thinking = last_msg.get('thinking')
+    if r['message_count']:
+        print(f"Last message role: {r['last_role']}")
+        print(f"Last message content length: {r['last_content_length']}")
+        thinking = r['last_thinking']
         if thinking:
             print(f"Thinking length: {len(thinking)}")
             print(f"Thinking preview: {thinking[:200]}...")
         else:
             print("Thinking: None")
         
-        blocks = last_msg.get('blocks', [])
+        blocks = json.loads(r['last_blocks']) if r['last_blocks'] else []
         print(f"Blocks count: {len(blocks)}")
         for i, block in enumerate(blocks):
             print(f"  Block {i}: type={block.get('type')}")
             if block.get('type') == 'thinking':
                 print(f"    Thinking content: {block.get('content', '')[:100]}...")
         
-        print(f"\nFull message keys: {list(last_msg.keys())}")
+        print(f"\nFull message keys: {json.loads(r['last_keys'])}")
 
 conn.close()
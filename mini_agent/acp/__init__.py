@@ -126,10 +126,10 @@ class MiniMaxACPAgent:
 
     async def _run_turn(self, state: SessionState, session_id: str) -> str:
         agent = state.agent
+        tool_schemas = agent.tool_schemas
         for _ in range(agent.max_steps):
             if state.cancelled:
                 return "cancelled"
-            tool_schemas = [tool.to_schema() for tool in agent.tools.values()]
             try:
                 response = await agent.llm.generate(messages=agent.messages, tools=tool_schemas)
             except Exception as exc:
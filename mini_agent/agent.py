@@ -3,22 +3,64 @@
 import asyncio
 import json
 import logging
+import reprlib
+import sys
 import time
+import traceback
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 from time import perf_counter
-from typing import AsyncGenerator, Optional
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Optional
 
 import tiktoken
 
 from .llm import LLMClient
 from .logger import AgentLogger
-from .schema import FunctionCall, LLMResponse, Message, ToolCall
+from .retry import RetryExhaustedError
+from .schema import Message
 from .tools.base import Tool, ToolResult
-from .utils import calculate_display_width
+from .utils import calculate_display_width, json_dumps_pretty
 
 logger = logging.getLogger("mini_agent.agent")
 
 
+@lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding | None:
+    """Return the shared cl100k_base encoding, or None if it cannot be loaded.
+
+    The result is cached for the life of the process, including a failure, so
+    an unavailable tokenizer is only attempted once and the character-based
+    fallback is used from then on.
+    """
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, using character-based estimate: {e}")
+        return None
+
+
+# Default maximum number of round summaries requested from the LLM at the same time
+_SUMMARY_CONCURRENCY = 4
+
+# Workspace directories already created by this process
+_ENSURED_DIRS: set[Path] = set()
+
+
+@lru_cache(maxsize=32)
+def _with_workspace_info(system_prompt: str, workspace: str) -> str:
+    """Append the Current Workspace section unless the prompt already has one."""
+    if "Current Workspace" in system_prompt:
+        return system_prompt
+    workspace_info = f"\n\n## Current Workspace\nYou are currently working in: `{workspace}`\nAll relative paths will be resolved relative to this directory."
+    return system_prompt + workspace_info
+
+
+def _never_cancelled() -> bool:
+    """Cancellation check used when the agent has no cancel event."""
+    return False
+
+
 # ANSI color codes
 class Colors:
     """Terminal color definitions"""
@@ -46,6 +88,59 @@ class Colors:
     BRIGHT_WHITE = "\033[97m"
 
 
+# Pre-rendered step box borders and labels used by the agent loop
+_BOX_WIDTH = 58
+_BOX_TOP = f"{Colors.DIM}╭{'─' * _BOX_WIDTH}╮{Colors.RESET}"
+_BOX_SIDE = f"{Colors.DIM}│{Colors.RESET}"
+_BOX_BOTTOM = f"{Colors.DIM}╰{'─' * _BOX_WIDTH}╯{Colors.RESET}"
+_LABEL_TOOL_CALL = f"{Colors.BRIGHT_YELLOW}🔧 Tool Call:{Colors.RESET}"
+_LABEL_ARGUMENTS = f"{Colors.DIM}   Arguments:{Colors.RESET}"
+_LABEL_RESULT = f"{Colors.BRIGHT_GREEN}✓ Result:{Colors.RESET}"
+_LABEL_ERROR = f"{Colors.BRIGHT_RED}✗ Error:{Colors.RESET}"
+_LABEL_RETRY_FAILED = f"\n{Colors.BRIGHT_RED}❌ Retry failed:{Colors.RESET}"
+_LABEL_LLM_ERROR = f"\n{Colors.BRIGHT_RED}❌ Error:{Colors.RESET}"
+_BANNER_DEEP_THINK = f"{Colors.BRIGHT_MAGENTA}🔮 Deep Think Mode Enabled{Colors.RESET}"
+
+# Tool display: argument values and results longer than these are cut
+_ARG_DISPLAY_LIMIT = 200
+_RESULT_DISPLAY_LIMIT = 300
+_RESULT_ELLIPSIS = f"{Colors.DIM}...{Colors.RESET}"
+
+# Bounded repr for container arguments, so huge values are never fully stringified
+_ARG_REPR = reprlib.Repr()
+_ARG_REPR.maxstring = _ARG_REPR.maxother = _ARG_DISPLAY_LIMIT
+_ARG_REPR.maxlist = _ARG_REPR.maxtuple = _ARG_REPR.maxdict = _ARG_REPR.maxset = 10
+
+
+def _truncate_for_display(value, limit: int = _ARG_DISPLAY_LIMIT, ellipsis: str = "..."):
+    """Shorten a tool argument or result for display, without stringifying it whole."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        value = bytes(value[: limit + 1]).decode("utf-8", errors="replace")
+    if isinstance(value, str):
+        return value[:limit] + ellipsis if len(value) > limit else value
+    preview = _ARG_REPR.repr(value)
+    if len(preview) > limit:
+        return preview[:limit] + ellipsis
+    # Small containers keep their structure in the JSON display
+    return preview if "..." in preview else value
+
+
+def _approx_json_chars(value) -> int:
+    """Approximate compact-JSON length of a value without serializing it."""
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, dict):
+        items = sum(len(str(key)) + 3 + _approx_json_chars(item) for key, item in value.items())
+        return 2 + items + max(len(value) - 1, 0)
+    if isinstance(value, (list, tuple)):
+        return 2 + sum(map(_approx_json_chars, value)) + max(len(value) - 1, 0)
+    if value is None or isinstance(value, (bool, int, float)):
+        return len(str(value))
+    return 16
+
+
 class Agent:
     """Single agent with basic tools and MCP support."""
 
@@ -58,30 +153,68 @@ class Agent:
         workspace_dir: str = "./workspace",
         token_limit: int = 80000,
         session_id: str = None,
+        summary_llm_client: Optional[LLMClient] = None,
+        summary_concurrency: int = _SUMMARY_CONCURRENCY,
     ):
         self.llm = llm_client
+        # Optional cheaper client used only for history summarization
+        self.summary_llm = summary_llm_client
+        # Max round summaries requested at once, to stay within provider rate limits
+        self.summary_concurrency = max(1, summary_concurrency)
         self.tools = {tool.name: tool for tool in tools}
         self.max_steps = max_steps
+        self._init_step_text_width()
         self.token_limit = token_limit
         self.workspace_dir = Path(workspace_dir)
         self.cancel_event: Optional[asyncio.Event] = None
+        # Terminal output queued during a step (see _emit/_flush_output)
+        self._out: list[str] = []
+        # Cancellation check used inside run/run_stream, rebound on each run
+        self._cancelled: Callable[[], bool] = self._check_cancelled
         self.session_id = session_id or "-----"
 
-        self.workspace_dir.mkdir(parents=True, exist_ok=True)
-
-        if "Current Workspace" not in system_prompt:
-            workspace_info = f"\n\n## Current Workspace\nYou are currently working in: `{self.workspace_dir.absolute()}`\nAll relative paths will be resolved relative to this directory."
-            system_prompt = system_prompt + workspace_info
+        workspace_abs = self.workspace_dir.absolute()
+        if workspace_abs not in _ENSURED_DIRS:
+            workspace_abs.mkdir(parents=True, exist_ok=True)
+            _ENSURED_DIRS.add(workspace_abs)
 
-        self.system_prompt = system_prompt
+        self.system_prompt = _with_workspace_info(system_prompt, str(workspace_abs))
 
-        self.messages: list[Message] = [Message(role="system", content=system_prompt)]
+        self.messages: list[Message] = [Message(role="system", content=self.system_prompt)]
 
         self.logger = AgentLogger()
+        # Request log entry being written in a worker thread (see _start_request_log)
+        self._request_log: asyncio.Future | None = None
 
         self.api_total_tokens: int = 0
         self._skip_next_token_check: bool = False
 
+        # Per-message token counts keyed by id(msg); the message is kept in the
+        # entry so an id can't be reused while cached (see _estimate_tokens)
+        self._token_cache: dict[int, tuple[Message, int]] = {}
+        # Byte-size upper bounds for messages not yet tokenized (see _token_upper_bound)
+        self._token_bound_cache: dict[int, tuple[Message, int]] = {}
+
+        # Pre-warm the tokenizer so the first step doesn't pay the load cost
+        _get_encoding()
+
+    @property
+    def tools(self) -> dict[str, Tool]:
+        """Tools available to the agent, keyed by name."""
+        return self._tools
+
+    @tools.setter
+    def tools(self, tools: dict[str, Tool]):
+        self._tools = tools
+        # Cached list and schemas handed to the LLM client on every step
+        self._tool_list: list[Tool] = list(tools.values())
+        self._tool_schemas: list[dict[str, Any]] = [tool.to_schema() for tool in self._tool_list]
+
+    @property
+    def tool_schemas(self) -> list[dict[str, Any]]:
+        """Tool schemas in Anthropic format, built once when tools are set."""
+        return self._tool_schemas
+
     def add_user_message(self, content: str):
         """Add a user message to history."""
         self.messages.append(Message(role="user", content=content))
@@ -92,6 +225,10 @@ class Agent:
             return True
         return False
 
+    def _bind_cancel_check(self):
+        """Bind self._cancelled to the current cancel event for the hot loop."""
+        self._cancelled = self.cancel_event.is_set if self.cancel_event is not None else _never_cancelled
+
     def _cleanup_incomplete_messages(self):
         """Remove the incomplete assistant message and its partial tool results."""
         last_assistant_idx = -1
@@ -105,54 +242,163 @@ class Agent:
 
         removed_count = len(self.messages) - last_assistant_idx
         if removed_count > 0:
-            self.messages = self.messages[:last_assistant_idx]
+            del self.messages[last_assistant_idx:]
             print(f"{Colors.DIM}   Cleaned up {removed_count} incomplete message(s){Colors.RESET}")
 
     def _estimate_tokens(self) -> int:
-        """Accurately calculate token count for message history using tiktoken"""
-        try:
-            encoding = tiktoken.get_encoding("cl100k_base")
-        except Exception:
+        """Accurately calculate token count for message history using tiktoken
+
+        Token counts are cached per message, so each step only tokenizes
+        messages it has not seen before. Entries for messages that are no
+        longer in the history (after summarization or cleanup) are dropped.
+        """
+        encoding = _get_encoding()
+        if encoding is None:
             return self._estimate_tokens_fallback()
 
-        total_tokens = 0
-
+        cache = self._token_cache
+        live_cache: dict[int, tuple[Message, int]] = {}
+        total = 0
+        uncounted: list[Message] = []
         for msg in self.messages:
-            if isinstance(msg.content, str):
-                total_tokens += len(encoding.encode(msg.content))
-            elif isinstance(msg.content, list):
-                for block in msg.content:
-                    if isinstance(block, dict):
-                        total_tokens += len(encoding.encode(str(block)))
-
-            if msg.thinking:
-                total_tokens += len(encoding.encode(msg.thinking))
-
-            if msg.tool_calls:
-                total_tokens += len(encoding.encode(str(msg.tool_calls)))
-
-            total_tokens += 4
-
-        return total_tokens
+            entry = cache.get(id(msg))
+            if entry is not None and entry[0] is msg:
+                live_cache[id(msg)] = entry
+                total += entry[1]
+            else:
+                uncounted.append(msg)
+
+        if uncounted:
+            for msg, count in zip(uncounted, self._count_message_tokens(encoding, uncounted)):
+                live_cache[id(msg)] = (msg, count)
+                total += count
+
+        self._token_cache = live_cache
+        return total
+
+    @staticmethod
+    def _count_message_tokens(encoding: tiktoken.Encoding, messages: list[Message]) -> list[int]:
+        """Count tokens for each message with a single batched encode."""
+        texts: list[str] = []
+        # Index into texts where each message's pieces end
+        ends: list[int] = []
+        for msg in messages:
+            texts.extend(Agent._message_texts(msg))
+            ends.append(len(texts))
+
+        lengths = [len(tokens) for tokens in encoding.encode_ordinary_batch(texts, num_threads=8)]
+        counts = []
+        start = 0
+        for end in ends:
+            # 4 tokens of per-message framing overhead
+            counts.append(sum(lengths[start:end]) + 4)
+            start = end
+        return counts
+
+    @staticmethod
+    def _message_texts(msg: Message) -> list[str]:
+        """Pieces of text in a message that count towards its tokens."""
+        texts: list[str] = []
+        if isinstance(msg.content, str):
+            texts.append(msg.content)
+        elif isinstance(msg.content, list):
+            for block in msg.content:
+                if isinstance(block, dict):
+                    texts.append(Agent._block_text(block))
+
+        if msg.thinking:
+            texts.append(msg.thinking)
+
+        if msg.tool_calls:
+            texts.append(msg.tool_calls_json())
+        return texts
+
+    @staticmethod
+    def _message_token_bound(msg: Message) -> int:
+        """Upper bound on a message's token count: its UTF-8 size in bytes.
+
+        Every BPE token covers at least one byte, so this never undercounts, and
+        it also bounds the character-based fallback estimate.
+        """
+        size = 4
+        for text in Agent._message_texts(msg):
+            size += len(text) if text.isascii() else len(text.encode("utf-8", "surrogatepass"))
+        return size
+
+    def _token_upper_bound(self) -> int:
+        """Cheap upper bound on history tokens, without running the tokenizer.
+
+        Messages with an exact cached count use it; the rest use their byte size.
+        """
+        token_cache = self._token_cache
+        bound_cache = self._token_bound_cache
+        live_bounds: dict[int, tuple[Message, int]] = {}
+        total = 0
+        for msg in self.messages:
+            key = id(msg)
+            entry = token_cache.get(key)
+            if entry is None or entry[0] is not msg:
+                entry = bound_cache.get(key)
+                if entry is None or entry[0] is not msg:
+                    entry = (msg, self._message_token_bound(msg))
+                live_bounds[key] = entry
+            total += entry[1]
+        self._token_bound_cache = live_bounds
+        return total
+
+    @staticmethod
+    def _block_text(block: dict) -> str:
+        """Text the model sees for a structured content block.
+
+        Text blocks contribute their text, tool_use/tool_result blocks their
+        input/content as compact JSON, anything else its compact JSON form.
+        """
+        block_type = block.get("type")
+        if block_type == "text":
+            return block.get("text", "")
+        if block_type == "tool_use":
+            payload = block.get("input")
+        elif block_type == "tool_result":
+            payload = block.get("content")
+            if isinstance(payload, str):
+                return payload
+        else:
+            payload = block
+        return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _block_chars(block: dict) -> int:
+        """Approximate length of _block_text(block), without building the text."""
+        block_type = block.get("type")
+        if block_type == "text":
+            return len(block.get("text", ""))
+        if block_type == "tool_use":
+            return _approx_json_chars(block.get("input"))
+        if block_type == "tool_result":
+            payload = block.get("content")
+            return len(payload) if isinstance(payload, str) else _approx_json_chars(payload)
+        return _approx_json_chars(block)
 
     def _estimate_tokens_fallback(self) -> int:
         """Fallback token estimation method (when tiktoken is unavailable)"""
-        total_chars = 0
-        for msg in self.messages:
-            if isinstance(msg.content, str):
-                total_chars += len(msg.content)
-            elif isinstance(msg.content, list):
-                for block in msg.content:
-                    if isinstance(block, dict):
-                        total_chars += len(str(block))
-
-            if msg.thinking:
-                total_chars += len(msg.thinking)
-
-            if msg.tool_calls:
-                total_chars += len(str(msg.tool_calls))
+        # ~2.5 characters per token
+        return int(sum(map(self._message_chars, self.messages)) * 0.4)
+
+    @staticmethod
+    def _message_chars(msg: Message) -> int:
+        """Character count of a message, as used by the fallback estimate."""
+        if isinstance(msg.content, str):
+            chars = len(msg.content)
+        elif isinstance(msg.content, list):
+            chars = sum(Agent._block_chars(block) for block in msg.content if isinstance(block, dict))
+        else:
+            chars = 0
 
-        return int(total_chars / 2.5)
+        if msg.thinking:
+            chars += len(msg.thinking)
+        if msg.tool_calls:
+            chars += len(msg.tool_calls_json())
+        return chars
 
     async def _summarize_messages(self):
         """Message history summarization: summarize conversations between user messages when tokens exceed limit"""
@@ -160,6 +406,10 @@ class Agent:
             self._skip_next_token_check = False
             return
 
+        # Far below the limit: skip the tokenizer entirely
+        if self.api_total_tokens <= self.token_limit and self._token_upper_bound() <= self.token_limit:
+            return
+
         estimated_tokens = self._estimate_tokens()
 
         should_summarize = estimated_tokens > self.token_limit or self.api_total_tokens > self.token_limit
@@ -172,59 +422,72 @@ class Agent:
         )
         print(f"{Colors.BRIGHT_YELLOW}🔄 Triggering message history summarization...{Colors.RESET}")
 
-        user_indices = [i for i, msg in enumerate(self.messages) if msg.role == "user" and i > 0]
+        # Split history into rounds in one pass: each user message and the
+        # execution messages that follow it
+        rounds: list[tuple[Message, list[Message]]] = []
+        for msg in islice(self.messages, 1, None):
+            if msg.role == "user":
+                rounds.append((msg, []))
+            elif rounds:
+                rounds[-1][1].append(msg)
 
-        if len(user_indices) < 1:
+        if len(rounds) < 1:
             print(f"{Colors.BRIGHT_YELLOW}⚠️  Insufficient messages, cannot summarize{Colors.RESET}")
             return
 
-        new_messages = [self.messages[0]]
-        summary_count = 0
+        # Rounds are independent, so summarize them concurrently (bounded)
+        semaphore = asyncio.Semaphore(self.summary_concurrency)
 
-        for i, user_idx in enumerate(user_indices):
-            new_messages.append(self.messages[user_idx])
+        async def summarize_round(execution_messages: list[Message], round_num: int) -> str:
+            if not execution_messages:
+                return ""
+            async with semaphore:
+                return await self._create_summary(execution_messages, round_num)
 
-            if i < len(user_indices) - 1:
-                next_user_idx = user_indices[i + 1]
-            else:
-                next_user_idx = len(self.messages)
+        summaries = await asyncio.gather(
+            *(summarize_round(execution_messages, i + 1) for i, (_, execution_messages) in enumerate(rounds))
+        )
 
-            execution_messages = self.messages[user_idx + 1 : next_user_idx]
+        # Everything after the system prompt is replaced in place
+        new_messages = []
+        summary_count = 0
 
-            if execution_messages:
-                summary_text = await self._create_summary(execution_messages, i + 1)
-                if summary_text:
-                    summary_message = Message(
-                        role="user",
-                        content=f"[Assistant Execution Summary]\n\n{summary_text}",
-                    )
-                    new_messages.append(summary_message)
-                    summary_count += 1
+        for (user_msg, _), summary_text in zip(rounds, summaries):
+            new_messages.append(user_msg)
 
-        self.messages = new_messages
+            if summary_text:
+                summary_message = Message(
+                    role="user",
+                    content=f"[Assistant Execution Summary]\n\n{summary_text}",
+                )
+                new_messages.append(summary_message)
+                summary_count += 1
+
+        self.messages[1:] = new_messages
 
         self._skip_next_token_check = True
 
         new_tokens = self._estimate_tokens()
         print(f"{Colors.BRIGHT_GREEN}✓ Summary completed, local tokens: {estimated_tokens} → {new_tokens}{Colors.RESET}")
-        print(f"{Colors.DIM}  Structure: system + {len(user_indices)} user messages + {summary_count} summaries{Colors.RESET}")
+        print(f"{Colors.DIM}  Structure: system + {len(rounds)} user messages + {summary_count} summaries{Colors.RESET}")
 
     async def _create_summary(self, messages: list[Message], round_num: int) -> str:
         """Create summary for one execution round"""
         if not messages:
             return ""
 
-        summary_content = f"Round {round_num} execution process:\n\n"
+        parts: list[str] = [f"Round {round_num} execution process:\n\n"]
         for msg in messages:
             if msg.role == "assistant":
                 content_text = msg.content if isinstance(msg.content, str) else str(msg.content)
-                summary_content += f"Assistant: {content_text}\n"
+                parts.append(f"Assistant: {content_text}\n")
                 if msg.tool_calls:
                     tool_names = [tc.function.name for tc in msg.tool_calls]
-                    summary_content += f"  → Called tools: {', '.join(tool_names)}\n"
+                    parts.append(f"  → Called tools: {', '.join(tool_names)}\n")
             elif msg.role == "tool":
                 result_preview = msg.content if isinstance(msg.content, str) else str(msg.content)
-                summary_content += f"  ← Tool returned: {result_preview}...\n"
+                parts.append(f"  ← Tool returned: {result_preview}...\n")
+        summary_content = "".join(parts)
 
         try:
             summary_prompt = f"""Please provide a concise summary of the following Agent execution process:
@@ -239,7 +502,8 @@ Requirements:
 5. Do not include "user" related content, only summarize the Agent's execution process"""
 
             summary_msg = Message(role="user", content=summary_prompt)
-            response = await self.llm.generate(
+            summary_llm = self.summary_llm or self.llm
+            response = await summary_llm.generate(
                 messages=[
                     Message(
                         role="system",
@@ -257,11 +521,350 @@ Requirements:
             print(f"{Colors.BRIGHT_RED}✗ Summary generation failed for round {round_num}: {e}{Colors.RESET}")
             return summary_content
 
+    async def _execute_tool_call(self, function_name: str, arguments: dict) -> tuple[ToolResult, float]:
+        """Execute a single tool call, converting failures into a ToolResult.
+
+        Returns:
+            Tuple of (result, elapsed seconds)
+        """
+        sid = self.session_id[-5:]
+        tool_start_time = time.time()
+
+        tool = self._tools.get(function_name)
+        if tool is None:
+            logger.error(f"[{sid}] 未知工具: {function_name}")
+            result = ToolResult(
+                success=False,
+                content="",
+                error=f"Unknown tool: {function_name}",
+            )
+            return result, time.time() - tool_start_time
+
+        try:
+            result = await tool.execute(**arguments)
+            logger.info("[%s] 工具 %s | success=%s | 耗时: %.2fs", sid, function_name, result.success, time.time() - tool_start_time)
+        except Exception as e:
+            logger.error(f"[{sid}] 工具执行异常: {function_name} | error={str(e)}")
+            error_detail = f"{type(e).__name__}: {str(e)}"
+            error_trace = traceback.format_exc()
+            result = ToolResult(
+                success=False,
+                content="",
+                error=f"Tool execution failed: {error_detail}\n\nTraceback:\n{error_trace}",
+            )
+
+        return result, time.time() - tool_start_time
+
+    def _tool_call_groups(self, calls: list[tuple[str, dict]]) -> list[list[int]]:
+        """Split a step's tool calls into groups that may run concurrently.
+
+        Consecutive calls to non-serial tools share a group; a call to a tool
+        marked ``serial`` gets a group of its own, so it waits for everything
+        before it and everything after it waits for it.
+
+        Returns:
+            Groups of indices into calls, in call order
+        """
+        groups: list[list[int]] = []
+        batch: list[int] = []
+        for index, (function_name, _) in enumerate(calls):
+            tool = self._tools.get(function_name)
+            if tool is None or not tool.serial:
+                batch.append(index)
+                continue
+            if batch:
+                groups.append(batch)
+                batch = []
+            groups.append([index])
+        if batch:
+            groups.append(batch)
+        return groups
+
+    async def _iter_tool_results(self, calls: list[tuple[str, dict]]) -> AsyncGenerator[tuple[int, ToolResult, float], None]:
+        """Execute a step's tool calls, yielding results as they finish.
+
+        Groups from _tool_call_groups run one after another; calls within a
+        group run concurrently and are yielded in completion order. If the run
+        is cancelled, tools still running are cancelled at once and groups
+        that have not started are skipped.
+
+        Args:
+            calls: List of (function_name, arguments) pairs
+
+        Yields:
+            (index into calls, result, elapsed seconds)
+        """
+
+        async def run_indexed(index: int) -> tuple[int, ToolResult, float]:
+            result, elapsed = await self._execute_tool_call(*calls[index])
+            return index, result, elapsed
+
+        # Wakes the wait below as soon as the run is cancelled
+        watcher = asyncio.ensure_future(self.cancel_event.wait()) if self.cancel_event is not None else None
+        try:
+            for group in self._tool_call_groups(calls):
+                if self._cancelled():
+                    return
+                # Create tasks explicitly so tools start in call order
+                tasks = [asyncio.create_task(run_indexed(index)) for index in group]
+                pending = set(tasks)
+                try:
+                    while pending:
+                        waiting = pending if watcher is None else pending | {watcher}
+                        done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                        for task in tasks:
+                            if task in done:
+                                pending.discard(task)
+                                yield task.result()
+                        if watcher is not None and watcher.done():
+                            return
+                finally:
+                    # Don't leave tools running if cancelled or the consumer stops early
+                    for task in pending:
+                        task.cancel()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+    async def _execute_tool_calls(self, calls: list[tuple[str, dict]]) -> list[tuple[ToolResult, float]]:
+        """Execute a step's tool calls, running independent ones concurrently.
+
+        Results are returned in call order. If the run is cancelled, remaining
+        calls are skipped and a shorter list is returned.
+
+        Args:
+            calls: List of (function_name, arguments) pairs
+
+        Returns:
+            List of (result, elapsed seconds) for the leading calls that ran
+        """
+        results: list[tuple[ToolResult, float] | None] = [None] * len(calls)
+        async for index, result, elapsed in self._iter_tool_results(calls):
+            results[index] = (result, elapsed)
+        # A cancelled group can leave gaps; keep only the prefix that ran
+        if None in results:
+            results = results[: results.index(None)]
+        return results
+
+    async def _await_unless_cancelled(self, awaitable) -> tuple[bool, Any]:
+        """Await something, abandoning it as soon as the run is cancelled.
+
+        Returns:
+            Tuple of (cancelled, result); result is None when cancelled
+        """
+        if self.cancel_event is None:
+            return False, await awaitable
+        task = asyncio.ensure_future(awaitable)
+        watcher = asyncio.ensure_future(self.cancel_event.wait())
+        try:
+            await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        except BaseException:
+            task.cancel()
+            raise
+        finally:
+            watcher.cancel()
+        if task.done():
+            return False, task.result()
+        task.cancel()
+        return True, None
+
+    async def _iter_unless_cancelled(self, stream: AsyncIterator[dict]) -> AsyncGenerator[dict, None]:
+        """Iterate an LLM stream, stopping as soon as the run is cancelled.
+
+        The stream is read directly. A single watcher waits for the cancel
+        event and, if a read is in progress, cancels the current task so the
+        read is abandoned; the stream is then closed, which drops the HTTP
+        response so the provider stops generating the rest of it.
+        """
+        if self.cancel_event is None:
+            async for item in stream:
+                yield item
+            return
+
+        task = asyncio.current_task()
+        reading = False
+        interrupted = False
+
+        def interrupt(watcher: asyncio.Future):
+            nonlocal interrupted
+            # Between reads the loop below sees the event itself
+            if reading and not watcher.cancelled():
+                interrupted = True
+                task.cancel()
+
+        watcher = asyncio.ensure_future(self.cancel_event.wait())
+        watcher.add_done_callback(interrupt)
+        try:
+            while not self.cancel_event.is_set():
+                reading = True
+                try:
+                    item = await stream.__anext__()
+                except StopAsyncIteration:
+                    return
+                except asyncio.CancelledError:
+                    if not interrupted:
+                        raise
+                    # Python 3.11+: still cancelled from elsewhere too
+                    uncancel = getattr(task, "uncancel", None)
+                    if uncancel is not None and uncancel():
+                        raise
+                    return
+                finally:
+                    reading = False
+                yield item
+        finally:
+            watcher.cancel()
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def _start_request_log(self):
+        """Write this step's request to the run log in a worker thread.
+
+        Serializing the history and writing it overlaps with the LLM call
+        instead of delaying it. Call _finish_request_log before the next
+        run log entry so entries stay in order.
+        """
+        self._request_log = asyncio.ensure_future(self._write_request_log(list(self.messages)))
+
+    async def _write_request_log(self, messages: list[Message]):
+        try:
+            await asyncio.to_thread(self.logger.log_request, messages, self._tool_list)
+        except Exception:
+            # The run log is diagnostic only; don't fail the step over it
+            logger.warning("写入请求日志失败", exc_info=True)
+
+    async def _finish_request_log(self):
+        """Wait for a request log entry still being written, if any."""
+        if self._request_log is not None:
+            await self._request_log
+            self._request_log = None
+
+    def _emit(self, text: str):
+        """Queue a line of terminal output; written out by _flush_output."""
+        self._out.append(text)
+
+    def _flush_output(self):
+        """Write all queued terminal output with a single write and flush."""
+        if self._out:
+            self._out.append("")
+            sys.stdout.write("\n".join(self._out))
+            sys.stdout.flush()
+            self._out.clear()
+
+    def _print_step_header(self, step: int):
+        """Print the boxed step header in a single write."""
+        if self._step_text_max_steps != self.max_steps:
+            self._init_step_text_width()
+        header = self._step_headers.get(step)
+        if header is None:
+            step_number = str(step + 1)
+            step_text = f"{Colors.BOLD}{Colors.BRIGHT_CYAN}💭 Step {step_number}/{self.max_steps}{Colors.RESET}"
+            # Step digits are ASCII, one column each
+            padding = max(0, _BOX_WIDTH - 1 - self._step_text_base_width - len(step_number))
+            header = f"\n{_BOX_TOP}\n{_BOX_SIDE} {step_text}{' ' * padding}{_BOX_SIDE}\n{_BOX_BOTTOM}"
+            self._step_headers[step] = header
+        self._emit(header)
+        self._flush_output()
+
+    def _init_step_text_width(self):
+        """Measure the step header text once, without the step number."""
+        self._step_text_max_steps = self.max_steps
+        self._step_text_base_width = calculate_display_width(
+            f"{Colors.BOLD}{Colors.BRIGHT_CYAN}💭 Step /{self.max_steps}{Colors.RESET}"
+        )
+        # Rendered step boxes, filled in as steps are reached
+        self._step_headers: dict[int, str] = {}
+
+    def _print_tool_call(self, function_name: str, arguments: dict):
+        """Queue a tool call header with its (truncated) arguments for output."""
+        truncated_args = {key: _truncate_for_display(value) for key, value in arguments.items()}
+        args_json = json_dumps_pretty(truncated_args)
+
+        self._emit(f"\n{_LABEL_TOOL_CALL} {Colors.BOLD}{Colors.CYAN}{function_name}{Colors.RESET}")
+        self._emit(_LABEL_ARGUMENTS)
+        for line in args_json.split("\n"):
+            self._emit(f"   {Colors.DIM}{line}{Colors.RESET}")
+
+    def _record_tool_result(self, tool_call_id: str, function_name: str, arguments: dict, result: ToolResult):
+        """Log, queue for output and append the tool message for a finished tool call."""
+        self.logger.log_tool_result(
+            tool_name=function_name,
+            arguments=arguments,
+            result_success=result.success,
+            result_content=result.content if result.success else None,
+            result_error=result.error if not result.success else None,
+        )
+
+        if result.success:
+            result_text = _truncate_for_display(result.content, _RESULT_DISPLAY_LIMIT, _RESULT_ELLIPSIS)
+            self._emit(f"{_LABEL_RESULT} {result_text}")
+        else:
+            self._emit(f"{_LABEL_ERROR} {Colors.RED}{result.error}{Colors.RESET}")
+
+        tool_msg = Message(
+            role="tool",
+            content=result.content if result.success else f"Error: {result.error}",
+            tool_call_id=tool_call_id,
+            name=function_name,
+        )
+        self.messages.append(tool_msg)
+
+    def _record_assistant_message(self, content: str, thinking: str | None, tool_calls: list | None, finish_reason: str):
+        """Log the model's response and append it to the history as an assistant message."""
+        self.logger.log_response(
+            content=content,
+            thinking=thinking,
+            tool_calls=tool_calls,
+            finish_reason=finish_reason,
+        )
+        self.messages.append(
+            Message(
+                role="assistant",
+                content=content,
+                thinking=thinking,
+                tool_calls=tool_calls,
+            )
+        )
+
+    def _start_tool_calls(self, tool_calls: list) -> list[tuple[str, dict]]:
+        """Print a step's tool calls and return them as (function_name, arguments) pairs."""
+        calls = [(tool_call.function.name, tool_call.function.arguments) for tool_call in tool_calls]
+        for function_name, arguments in calls:
+            self._print_tool_call(function_name, arguments)
+        self._flush_output()
+        return calls
+
+    def _cancel_run(self) -> str:
+        """Drop the incomplete step from history and return the cancellation message."""
+        self._cleanup_incomplete_messages()
+        return "Task cancelled by user."
+
+    @staticmethod
+    def _print_step_timing(step: int, step_start_time: float, run_start_time: float):
+        """Print how long the step and the run so far took."""
+        step_elapsed = perf_counter() - step_start_time
+        total_elapsed = perf_counter() - run_start_time
+        print(f"\n{Colors.DIM}⏱️  Step {step + 1} completed in {step_elapsed:.2f}s (total: {total_elapsed:.2f}s){Colors.RESET}")
+
+    @staticmethod
+    def _llm_error_message(e: Exception) -> str:
+        """Print and return the error message for a failed LLM call."""
+        if isinstance(e, RetryExhaustedError):
+            error_msg = f"LLM call failed after {e.attempts} retries\nLast error: {str(e.last_exception)}"
+            print(f"{_LABEL_RETRY_FAILED} {error_msg}")
+        else:
+            error_msg = f"LLM call failed: {str(e)}"
+            print(f"{_LABEL_LLM_ERROR} {error_msg}")
+        return error_msg
+
     async def run(self, user_message: str = "", cancel_event: Optional[asyncio.Event] = None, enable_deep_think: bool = False) -> str:
         """Execute agent loop until task is complete or max steps reached."""
         if cancel_event is not None:
             self.cancel_event = cancel_event
+        self._bind_cancel_check()
 
+        await self._finish_request_log()
         self.logger.start_new_run()
         print(f"{Colors.DIM}📝 Log file: {self.logger.get_log_file_path()}{Colors.RESET}")
 
@@ -272,144 +875,60 @@ Requirements:
         run_start_time = perf_counter()
 
         while step < self.max_steps:
-            if self._check_cancelled():
-                self._cleanup_incomplete_messages()
-                cancel_msg = "Task cancelled by user."
+            if self._cancelled():
+                cancel_msg = self._cancel_run()
                 print(f"\n{Colors.BRIGHT_YELLOW}⚠️  {cancel_msg}{Colors.RESET}")
                 return cancel_msg
 
             step_start_time = perf_counter()
             await self._summarize_messages()
 
-            BOX_WIDTH = 58
-            step_text = f"{Colors.BOLD}{Colors.BRIGHT_CYAN}💭 Step {step + 1}/{self.max_steps}{Colors.RESET}"
-            step_display_width = calculate_display_width(step_text)
-            padding = max(0, BOX_WIDTH - 1 - step_display_width)
-
-            print(f"\n{Colors.DIM}╭{'─' * BOX_WIDTH}╮{Colors.RESET}")
-            print(f"{Colors.DIM}│{Colors.RESET} {step_text}{' ' * padding}{Colors.DIM}│{Colors.RESET}")
-            print(f"{Colors.DIM}╰{'─' * BOX_WIDTH}╯{Colors.RESET}")
+            self._print_step_header(step)
 
-            tool_list = list(self.tools.values())
-
-            self.logger.log_request(messages=self.messages, tools=tool_list)
+            self._start_request_log()
 
             try:
-                response = await self.llm.generate(messages=self.messages, tools=tool_list, enable_deep_think=enable_deep_think)
+                cancelled, response = await self._await_unless_cancelled(
+                    self.llm.generate(messages=self.messages, tools=self._tool_schemas, enable_deep_think=enable_deep_think)
+                )
             except Exception as e:
-                from .retry import RetryExhaustedError
+                return self._llm_error_message(e)
+            finally:
+                await self._finish_request_log()
 
-                if isinstance(e, RetryExhaustedError):
-                    error_msg = f"LLM call failed after {e.attempts} retries\nLast error: {str(e.last_exception)}"
-                    print(f"\n{Colors.BRIGHT_RED}❌ Retry failed:{Colors.RESET} {error_msg}")
-                else:
-                    error_msg = f"LLM call failed: {str(e)}"
-                    print(f"\n{Colors.BRIGHT_RED}❌ Error:{Colors.RESET} {error_msg}")
-                return error_msg
+            if cancelled:
+                cancel_msg = self._cancel_run()
+                print(f"\n{Colors.BRIGHT_YELLOW}⚠️  {cancel_msg}{Colors.RESET}")
+                return cancel_msg
 
             if response.usage:
                 self.api_total_tokens = response.usage.total_tokens
 
-            self.logger.log_response(
-                content=response.content,
-                thinking=response.thinking,
-                tool_calls=response.tool_calls,
-                finish_reason=response.finish_reason,
-            )
-
-            assistant_msg = Message(
-                role="assistant",
-                content=response.content,
-                thinking=response.thinking,
-                tool_calls=response.tool_calls,
-            )
-            self.messages.append(assistant_msg)
+            self._record_assistant_message(response.content, response.thinking, response.tool_calls, response.finish_reason)
 
             if not response.tool_calls:
-                step_elapsed = perf_counter() - step_start_time
-                total_elapsed = perf_counter() - run_start_time
-                print(f"\n{Colors.DIM}⏱️  Step {step + 1} completed in {step_elapsed:.2f}s (total: {total_elapsed:.2f}s){Colors.RESET}")
+                self._print_step_timing(step, step_start_time, run_start_time)
                 return response.content
 
-            if self._check_cancelled():
-                self._cleanup_incomplete_messages()
-                cancel_msg = "Task cancelled by user."
+            if self._cancelled():
+                cancel_msg = self._cancel_run()
                 print(f"\n{Colors.BRIGHT_YELLOW}⚠️  {cancel_msg}{Colors.RESET}")
                 return cancel_msg
 
-            for tool_call in response.tool_calls:
-                tool_call_id = tool_call.id
-                function_name = tool_call.function.name
-                arguments = tool_call.function.arguments
-
-                print(f"\n{Colors.BRIGHT_YELLOW}🔧 Tool Call:{Colors.RESET} {Colors.BOLD}{Colors.CYAN}{function_name}{Colors.RESET}")
-
-                print(f"{Colors.DIM}   Arguments:{Colors.RESET}")
-                truncated_args = {}
-                for key, value in arguments.items():
-                    value_str = str(value)
-                    if len(value_str) > 200:
-                        truncated_args[key] = value_str[:200] + "..."
-                    else:
-                        truncated_args[key] = value
-                args_json = json.dumps(truncated_args, indent=2, ensure_ascii=False)
-                for line in args_json.split("\n"):
-                    print(f"   {Colors.DIM}{line}{Colors.RESET}")
-
-                if function_name not in self.tools:
-                    result = ToolResult(
-                        success=False,
-                        content="",
-                        error=f"Unknown tool: {function_name}",
-                    )
-                else:
-                    try:
-                        tool = self.tools[function_name]
-                        result = await tool.execute(**arguments)
-                    except Exception as e:
-                        import traceback
-
-                        error_detail = f"{type(e).__name__}: {str(e)}"
-                        error_trace = traceback.format_exc()
-                        result = ToolResult(
-                            success=False,
-                            content="",
-                            error=f"Tool execution failed: {error_detail}\n\nTraceback:\n{error_trace}",
-                        )
-
-                self.logger.log_tool_result(
-                    tool_name=function_name,
-                    arguments=arguments,
-                    result_success=result.success,
-                    result_content=result.content if result.success else None,
-                    result_error=result.error if not result.success else None,
-                )
+            calls = self._start_tool_calls(response.tool_calls)
 
-                if result.success:
-                    result_text = result.content
-                    if len(result_text) > 300:
-                        result_text = result_text[:300] + f"{Colors.DIM}...{Colors.RESET}"
-                    print(f"{Colors.BRIGHT_GREEN}✓ Result:{Colors.RESET} {result_text}")
-                else:
-                    print(f"{Colors.BRIGHT_RED}✗ Error:{Colors.RESET} {Colors.RED}{result.error}{Colors.RESET}")
-
-                tool_msg = Message(
-                    role="tool",
-                    content=result.content if result.success else f"Error: {result.error}",
-                    tool_call_id=tool_call_id,
-                    name=function_name,
-                )
-                self.messages.append(tool_msg)
+            results = await self._execute_tool_calls(calls)
 
-                if self._check_cancelled():
-                    self._cleanup_incomplete_messages()
-                    cancel_msg = "Task cancelled by user."
-                    print(f"\n{Colors.BRIGHT_YELLOW}⚠️  {cancel_msg}{Colors.RESET}")
-                    return cancel_msg
+            for tool_call, (result, _) in zip(response.tool_calls, results):
+                self._record_tool_result(tool_call.id, tool_call.function.name, tool_call.function.arguments, result)
+            self._flush_output()
+
+            if self._cancelled():
+                cancel_msg = self._cancel_run()
+                print(f"\n{Colors.BRIGHT_YELLOW}⚠️  {cancel_msg}{Colors.RESET}")
+                return cancel_msg
 
-            step_elapsed = perf_counter() - step_start_time
-            total_elapsed = perf_counter() - run_start_time
-            print(f"\n{Colors.DIM}⏱️  Step {step + 1} completed in {step_elapsed:.2f}s (total: {total_elapsed:.2f}s){Colors.RESET}")
+            self._print_step_timing(step, step_start_time, run_start_time)
 
             step += 1
 
@@ -427,18 +946,18 @@ Requirements:
         start_time = time.time()
         sid = self.session_id[-5:] if self.session_id else "-----"
         
-        logger.info(f"[{sid}] 开始 | message: {user_message[:50]}{'...' if len(user_message) > 50 else ''} | deep_think: {enable_deep_think}")
+        logger.info("[%s] 开始 | message: %.50s%s | deep_think: %s", sid, user_message, "..." if len(user_message) > 50 else "", enable_deep_think)
         
         if cancel_event is not None:
             self.cancel_event = cancel_event
+        self._bind_cancel_check()
 
+        await self._finish_request_log()
         self.logger.start_new_run()
         
         if enable_deep_think:
-            print(f"{Colors.BRIGHT_MAGENTA}🔮 Deep Think Mode Enabled{Colors.RESET}")
-            print(f"{Colors.DIM}📝 Log file: {self.logger.get_log_file_path()}{Colors.RESET}")
-        else:
-            print(f"{Colors.DIM}📝 Log file: {self.logger.get_log_file_path()}{Colors.RESET}")
+            print(_BANNER_DEEP_THINK)
+        print(f"{Colors.DIM}📝 Log file: {self.logger.get_log_file_path()}{Colors.RESET}")
 
         self.add_user_message(user_message)
 
@@ -446,34 +965,23 @@ Requirements:
         run_start_time = perf_counter()
 
         while step < self.max_steps:
-            if self._check_cancelled():
-                self._cleanup_incomplete_messages()
+            if self._cancelled():
                 logger.error(f"[{sid}] 任务被用户取消")
-                yield {"type": "error", "content": "Task cancelled by user."}
+                yield {"type": "error", "content": self._cancel_run()}
                 return
 
             step_start_time = perf_counter()
             await self._summarize_messages()
 
-            BOX_WIDTH = 58
-            step_text = f"{Colors.BOLD}{Colors.BRIGHT_CYAN}💭 Step {step + 1}/{self.max_steps}{Colors.RESET}"
-            step_display_width = calculate_display_width(step_text)
-            padding = max(0, BOX_WIDTH - 1 - step_display_width)
+            self._print_step_header(step)
 
-            print(f"\n{Colors.DIM}╭{'─' * BOX_WIDTH}╮{Colors.RESET}")
-            print(f"{Colors.DIM}│{Colors.RESET} {step_text}{' ' * padding}{Colors.DIM}│{Colors.RESET}")
-            print(f"{Colors.DIM}╰{'─' * BOX_WIDTH}╯{Colors.RESET}")
-
-            tool_list = list(self.tools.values())
-            
-            self.logger.log_request(messages=self.messages, tools=tool_list)
+            self._start_request_log()
 
-            full_content = ""
-            thinking_content = None
             thinking_started = False
             assistant_started = False
-            full_response = ""
-            thinking_content = ""
+            # Collected as parts and joined once the stream ends
+            content_parts: list[str] = []
+            thinking_parts: list[str] = []
             thinking_duration_value = None
 
             llm_start_time = time.time()
@@ -481,9 +989,11 @@ Requirements:
             
             try:
                 chunk_count = 0
-                collected_tool_calls = []
+                tool_calls_for_msg = None
+                finish_reason = "stop"
                 
-                async for chunk in self.llm.stream_generate(messages=self.messages, tools=tool_list, enable_deep_think=enable_deep_think):
+                stream = self.llm.stream_generate(messages=self.messages, tools=self._tool_schemas, enable_deep_think=enable_deep_think)
+                async for chunk in self._iter_unless_cancelled(stream):
                     chunk_count += 1
                     chunk_type = chunk.get("type", "")
                     
@@ -493,8 +1003,9 @@ Requirements:
                         yield {"type": "thinking_start", "content": ""}
                     
                     elif chunk_type == "thinking":
-                        thinking_content = (thinking_content or "") + chunk.get("content", "")
-                        yield {"type": "thinking", "content": chunk.get("content", "")}
+                        thinking_chunk = chunk.get("content", "")
+                        thinking_parts.append(thinking_chunk)
+                        yield {"type": "thinking", "content": thinking_chunk}
                     
                     elif chunk_type == "thinking_end":
                         thinking_duration_value = chunk.get("duration")
@@ -510,80 +1021,50 @@ Requirements:
                                 yield {"type": "thinking_end", "duration": thinking_duration_value}
                             yield {"type": "assistant_start", "content": ""}
                         if content:
-                            full_response += content
+                            content_parts.append(content)
                             yield {"type": "content", "content": content}
                     
                     elif chunk_type == "done":
-                        collected_tool_calls = chunk.get("tool_calls", [])
+                        # The client assembles the final response, tool calls included
+                        response = chunk["response"]
+                        tool_calls_for_msg = response.tool_calls
+                        finish_reason = response.finish_reason or "stop"
+                        if response.usage:
+                            self.api_total_tokens = response.usage.total_tokens
+
+                await self._finish_request_log()
+                if self._cancelled():
+                    logger.error(f"[{sid}] 任务被用户取消")
+                    yield {"type": "error", "content": self._cancel_run()}
+                    return
+
+                full_response = "".join(content_parts)
+                thinking_content = "".join(thinking_parts)
 
                 if thinking_content and thinking_duration_value is None and thinking_start_time:
                     thinking_duration_value = round(time.time() - thinking_start_time, 1)
                     yield {"type": "thinking_end", "duration": thinking_duration_value}
 
                 llm_elapsed = time.time() - llm_start_time
-                logger.info(f"[{sid}] LLM完成 | chunks={chunk_count} | content={len(full_response)} | thinking={len(thinking_content) if thinking_content else 0} | thinking_duration={thinking_duration_value} | tools={len(collected_tool_calls)} | 耗时: {llm_elapsed:.2f}s")
-                
-                if collected_tool_calls:
-                    for tc in collected_tool_calls:
-                        if tc.get("type") == "function" and "function" in tc:
-                            logger.info(f"[{sid}] 工具调用: {tc['function']['name']} | 参数: {tc['function']['arguments']}")
-                        elif "name" in tc:
-                            logger.info(f"[{sid}] 工具调用: {tc['name']} | 参数: {tc['arguments']}")
-
-                tool_calls_for_msg = None
-                if collected_tool_calls:
-                    tool_calls_for_msg = []
-                    for tc in collected_tool_calls:
-                        if tc.get("type") == "function" and "function" in tc:
-                            args = tc["function"]["arguments"]
-                            if isinstance(args, str):
-                                try:
-                                    args = json.loads(args)
-                                except:
-                                    args = {}
-                            tool_calls_for_msg.append(ToolCall(
-                                id=tc["id"],
-                                type="function",
-                                function=FunctionCall(
-                                    name=tc["function"]["name"],
-                                    arguments=args,
-                                ),
-                            ))
-                        elif "name" in tc:
-                            args = tc["arguments"]
-                            if isinstance(args, str):
-                                try:
-                                    args = json.loads(args)
-                                except:
-                                    args = {}
-                            tool_calls_for_msg.append(ToolCall(
-                                id=tc["id"],
-                                type="function",
-                                function=FunctionCall(
-                                    name=tc["name"],
-                                    arguments=args,
-                                ),
-                            ))
-
-                self.logger.log_response(
-                    content=full_response,
-                    thinking=thinking_content or None,
-                    tool_calls=tool_calls_for_msg,
-                    finish_reason="stop",
+                logger.info(
+                    "[%s] LLM完成 | chunks=%d | content=%d | thinking=%d | thinking_duration=%s | tools=%d | 耗时: %.2fs",
+                    sid,
+                    chunk_count,
+                    len(full_response),
+                    len(thinking_content) if thinking_content else 0,
+                    thinking_duration_value,
+                    len(tool_calls_for_msg or []),
+                    llm_elapsed,
                 )
 
-                assistant_msg = Message(
-                    role="assistant",
-                    content=full_response,
-                    thinking=thinking_content or None,
-                    tool_calls=tool_calls_for_msg,
-                )
-                self.messages.append(assistant_msg)
+                self._record_assistant_message(full_response, thinking_content or None, tool_calls_for_msg, finish_reason)
+
+                # Reuse the message's cached tool-call JSON (also used for token counting)
+                if tool_calls_for_msg and logger.isEnabledFor(logging.INFO):
+                    logger.info("[%s] 工具调用: %s", sid, self.messages[-1].tool_calls_json())
 
-                if not collected_tool_calls:
-                    step_elapsed = perf_counter() - step_start_time
-                    total_elapsed = perf_counter() - run_start_time
-                    print(f"\n{Colors.DIM}⏱️  Step {step + 1} completed in {step_elapsed:.2f}s (total: {total_elapsed:.2f}s){Colors.RESET}")
+                if not tool_calls_for_msg:
+                    self._print_step_timing(step, step_start_time, run_start_time)
                     yield {
                         "type": "done",
                         "content": full_response,
@@ -592,137 +1073,63 @@ Requirements:
                         "steps": step + 1,
                         "tool_calls": 0,
                     }
-                    logger.info(f"[{sid}] 完成 | steps={step + 1} | 耗时: {time.time() - start_time:.2f}s")
+                    logger.info("[%s] 完成 | steps=%d | 耗时: %.2fs", sid, step + 1, time.time() - start_time)
                     return
 
-                if self._check_cancelled():
-                    self._cleanup_incomplete_messages()
+                if self._cancelled():
                     logger.error(f"[{sid}] 任务被用户取消")
-                    yield {"type": "error", "content": "Task cancelled by user."}
+                    yield {"type": "error", "content": self._cancel_run()}
                     return
                 
-                for tool_call in collected_tool_calls:
-                    tool_call_id = tool_call["id"]
-                    if tool_call.get("type") == "function" and "function" in tool_call:
-                        function_name = tool_call["function"]["name"]
-                        arguments = tool_call["function"]["arguments"]
-                    else:
-                        function_name = tool_call["name"]
-                        arguments = tool_call["arguments"]
-                    if isinstance(arguments, str):
-                        try:
-                            arguments = json.loads(arguments)
-                        except:
-                            arguments = {}
-
-                    print(f"\n{Colors.BRIGHT_YELLOW}🔧 Tool Call:{Colors.RESET} {Colors.BOLD}{Colors.CYAN}{function_name}{Colors.RESET}")
-
-                    print(f"{Colors.DIM}   Arguments:{Colors.RESET}")
-                    truncated_args = {}
-                    for key, value in arguments.items():
-                        value_str = str(value)
-                        if len(value_str) > 200:
-                            truncated_args[key] = value_str[:200] + "..."
-                        else:
-                            truncated_args[key] = value
-                    args_json = json.dumps(truncated_args, indent=2, ensure_ascii=False)
-                    for line in args_json.split("\n"):
-                        print(f"   {Colors.DIM}{line}{Colors.RESET}")
+                calls = self._start_tool_calls(tool_calls_for_msg)
 
+                for tool_call, (function_name, arguments) in zip(tool_calls_for_msg, calls):
                     yield {
                         "type": "tool_call",
                         "tool_name": function_name,
                         "arguments": arguments,
-                        "tool_call_id": tool_call_id,
+                        "tool_call_id": tool_call.id,
                     }
 
-                    if function_name not in self.tools:
-                        logger.error(f"[{sid}] 未知工具: {function_name}")
-                        tool_start_time = time.time()
-                        result = ToolResult(
-                            success=False,
-                            content="",
-                            error=f"Unknown tool: {function_name}",
-                        )
-                    else:
-                        try:
-                            tool = self.tools[function_name]
-                            tool_start_time = time.time()
-                            result = await tool.execute(**arguments)
-                            logger.info(f"[{sid}] 工具 {function_name} | success={result.success} | 耗时: {time.time() - tool_start_time:.2f}s")
-                        except Exception as e:
-                            import traceback
-                            logger.error(f"[{sid}] 工具执行异常: {function_name} | error={str(e)}")
-                            error_detail = f"{type(e).__name__}: {str(e)}"
-                            error_trace = traceback.format_exc()
-                            result = ToolResult(
-                                success=False,
-                                content="",
-                                error=f"Tool execution failed: {error_detail}\n\nTraceback:\n{error_trace}",
-                            )
-
-                    self.logger.log_tool_result(
-                        tool_name=function_name,
-                        arguments=arguments,
-                        result_success=result.success,
-                        result_content=result.content if result.success else None,
-                        result_error=result.error if not result.success else None,
-                    )
-
+                # Report each result as soon as its tool finishes ...
+                results: list[ToolResult | None] = [None] * len(calls)
+                async for index, result, elapsed in self._iter_tool_results(calls):
+                    results[index] = result
+                    tool_call = tool_calls_for_msg[index]
                     yield {
                         "type": "tool_result",
-                        "tool_name": function_name,
+                        "tool_name": tool_call.function.name,
                         "success": result.success,
                         "result": result.content if result.success else result.error,
-                        "tool_call_id": tool_call_id,
-                        "duration": round(time.time() - tool_start_time, 1),
+                        "tool_call_id": tool_call.id,
+                        "duration": round(elapsed, 1),
                     }
 
-                    if result.success:
-                        result_text = result.content
-                        if len(result_text) > 300:
-                            result_text = result_text[:300] + f"{Colors.DIM}...{Colors.RESET}"
-                        print(f"{Colors.BRIGHT_GREEN}✓ Result:{Colors.RESET} {result_text}")
-                    else:
-                        print(f"{Colors.BRIGHT_RED}✗ Error:{Colors.RESET} {Colors.RED}{result.error}{Colors.RESET}")
-
-                    tool_msg = Message(
-                        role="tool",
-                        content=result.content if result.success else f"Error: {result.error}",
-                        tool_call_id=tool_call_id,
-                        name=function_name,
-                    )
-                    self.messages.append(tool_msg)
-
-                    if self._check_cancelled():
-                        self._cleanup_incomplete_messages()
-                        logger.error(f"[{sid}] 任务被用户取消")
-                        yield {"type": "error", "content": "Task cancelled by user."}
-                        return
-
-                step_elapsed = perf_counter() - step_start_time
-                total_elapsed = perf_counter() - run_start_time
-                print(f"\n{Colors.DIM}⏱️  Step {step + 1} completed in {step_elapsed:.2f}s (total: {total_elapsed:.2f}s){Colors.RESET}")
+                # ... but keep tool messages in the order the model issued the calls
+                for tool_call, result in zip(tool_calls_for_msg, results):
+                    if result is None:
+                        break
+                    self._record_tool_result(tool_call.id, tool_call.function.name, tool_call.function.arguments, result)
+                self._flush_output()
+
+                if self._cancelled():
+                    logger.error(f"[{sid}] 任务被用户取消")
+                    yield {"type": "error", "content": self._cancel_run()}
+                    return
+
+                self._print_step_timing(step, step_start_time, run_start_time)
 
                 step += 1
 
             except Exception as e:
-                from .retry import RetryExhaustedError
-
-                if isinstance(e, RetryExhaustedError):
-                    error_msg = f"LLM call failed after {e.attempts} retries\nLast error: {str(e.last_exception)}"
-                    print(f"\n{Colors.BRIGHT_RED}❌ Retry failed:{Colors.RESET} {error_msg}")
-                else:
-                    error_msg = f"LLM call failed: {str(e)}"
-                    print(f"\n{Colors.BRIGHT_RED}❌ Error:{Colors.RESET} {error_msg}")
-                logger.error(f"[{sid}] 异常: {error_msg}")
-                import traceback
-                logger.error(f"[{sid}] 堆栈:\n{traceback.format_exc()}")
+                await self._finish_request_log()
+                error_msg = self._llm_error_message(e)
+                # The handler formats the traceback only if the record is emitted
+                logger.exception("[%s] 异常: %s", sid, error_msg)
                 yield {"type": "error", "content": error_msg}
                 return
 
         error_msg = f"Task couldn't be completed after {self.max_steps} steps."
-        print(f"\n{Colors.BRIGHT_YELLOW}⚠️  {error_msg}{Colors.RESET}")
         logger.error(f"[{sid}] {error_msg}")
         yield {"type": "error", "content": error_msg}
 
@@ -75,6 +75,12 @@ class Colors:
     BG_BLUE = "\033[44m"
 
 
+# Pre-rendered stream banners and the separator printed after every turn
+_BANNER_THINKING = f"\n{Colors.BOLD}{Colors.MAGENTA}🧠 Thinking:{Colors.RESET}\n{Colors.DIM}"
+_BANNER_ASSISTANT = f"\n{Colors.BOLD}{Colors.BRIGHT_BLUE}🤖 Assistant:{Colors.RESET}\n{Colors.CYAN}"
+_TURN_SEPARATOR = f"\n{Colors.DIM}{'─' * 60}{Colors.RESET}\n"
+
+
 def get_log_directory() -> Path:
     """Get the log directory path."""
     return Path.cwd() / "logs"
@@ -717,7 +723,7 @@ async def run_agent(workspace_dir: Path, task: str = None,stream: bool = False):
                 elif command == "/clear":
                     # Clear message history but keep system prompt
                     old_count = len(agent.messages)
-                    agent.messages = [agent.messages[0]]  # Keep only system message
+                    del agent.messages[1:]  # Keep only system message
                     print(f"{Colors.GREEN}✅ Cleared {old_count - 1} messages, starting new session{Colors.RESET}\n")
                     continue
 
@@ -817,29 +823,30 @@ async def run_agent(workspace_dir: Path, task: str = None,stream: bool = False):
             try:
                 # 调用智能体 - 选择流式或非流式
                 if stream:
+                    # Write each event with a single stdout write and flush it once,
+                    # instead of several print(..., flush=True) calls per chunk
+                    write = sys.stdout.write
                     async for event in agent.run_stream(user_input, cancel_event=cancel_event):
                         event_type = event.get("type", "")
                         if event_type == "thinking_start":
-                            print(f"\n{Colors.BOLD}{Colors.MAGENTA}🧠 Thinking:{Colors.RESET}")
-                            print(f"{Colors.DIM}", end="", flush=True)
+                            write(_BANNER_THINKING)
                         elif event_type == "thinking":
-                            print(event.get("content", ""), end="", flush=True)
+                            write(event.get("content", ""))
                         elif event_type == "assistant_start":
-                            print(f"\n{Colors.BOLD}{Colors.BRIGHT_BLUE}🤖 Assistant:{Colors.RESET}")
-                            print(f"{Colors.CYAN}", end="", flush=True)
+                            write(_BANNER_ASSISTANT)
                         elif event_type == "content":
-                            print(event.get("content", ""), end="", flush=True)
+                            write(event.get("content", ""))
                         elif event_type == "tool_call":
                             tool_name = event.get("tool_name", "")
-                            print(f"\n{Colors.BRIGHT_GREEN}🔧 Tool: {tool_name}{Colors.RESET}")
+                            write(f"\n{Colors.BRIGHT_GREEN}🔧 Tool: {tool_name}{Colors.RESET}\n")
                         elif event_type == "tool_result":
                             tool_name = event.get("tool_name", "")
                             success = event.get("success", False)
                             status = "✓" if success else "✗"
-                            print(f"{Colors.BRIGHT_GREEN}{status} Tool result: {tool_name}{Colors.RESET}")
+                            write(f"{Colors.BRIGHT_GREEN}{status} Tool result: {tool_name}{Colors.RESET}\n")
                         elif event_type == "done":
-                            print(f"\n{Colors.RESET}")
-                            print(f"{Colors.DIM}✅ Task completed in {event.get('steps', 1)} steps{Colors.RESET}")
+                            write(f"\n{Colors.RESET}\n{Colors.DIM}✅ Task completed in {event.get('steps', 1)} steps{Colors.RESET}\n")
+                        sys.stdout.flush()
 
                         if esc_cancelled[0]:
                             cancel_event.set()
@@ -859,7 +866,7 @@ async def run_agent(workspace_dir: Path, task: str = None,stream: bool = False):
                 esc_thread.join(timeout=0.2)
 
             # Visual separation
-            print(f"\n{Colors.DIM}{'─' * 60}{Colors.RESET}\n")
+            print(_TURN_SEPARATOR)
 
         except KeyboardInterrupt:
             print(f"\n\n{Colors.BRIGHT_YELLOW}👋 Interrupt signal detected, exiting...{Colors.RESET}\n")
@@ -1,18 +1,70 @@
 """Anthropic LLM client implementation."""
 
+import asyncio
 import json
 import logging
 import time
+import weakref
+from itertools import islice
 from typing import Any, AsyncGenerator
 
 import anthropic
+import httpx
 
-from ..retry import RetryConfig, async_retry
+from ..retry import RetryConfig, RetryExhaustedError, async_retry
 from ..schema import FunctionCall, LLMResponse, Message, TokenUsage, ToolCall
-from .base import LLMClientBase
+from ..utils import json_dumps, json_loads
+from .base import DEFAULT_MAX_CONNECTIONS, DEFAULT_MAX_KEEPALIVE_CONNECTIONS, HTTP2_AVAILABLE, LLMClientBase
 
 logger = logging.getLogger(__name__)
 
+# Output token cap sent with every request unless overridden
+DEFAULT_MAX_TOKENS = 16384
+
+# Number of distinct tool sets whose converted schemas each client remembers
+_TOOLS_CACHE_SIZE = 32
+
+# SDK clients shared by all AnthropicClients with the same endpoint, key and
+# pool limits. Kept per event loop, since pooled connections can't cross loops.
+_CLIENT_CACHE: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, anthropic.AsyncAnthropic]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _build_client(api_base: str, api_key: str, max_connections: int, max_keepalive_connections: int) -> anthropic.AsyncAnthropic:
+    """Create an SDK client with its own connection pool."""
+    # SDK default httpx client (timeouts, redirects) with a larger pool
+    http_client = anthropic.DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        ),
+        http2=HTTP2_AVAILABLE,
+    )
+    return anthropic.AsyncAnthropic(
+        base_url=api_base,
+        api_key=api_key,
+        default_headers={"Authorization": f"Bearer {api_key}"},
+        http_client=http_client,
+    )
+
+
+def _shared_client(api_base: str, api_key: str, max_connections: int, max_keepalive_connections: int) -> anthropic.AsyncAnthropic:
+    """Get the SDK client shared within the running event loop, creating it if needed."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Outside a loop there's nothing safe to share with
+        return _build_client(api_base, api_key, max_connections, max_keepalive_connections)
+
+    # No await between lookup and insert, so no lock is needed
+    clients = _CLIENT_CACHE.setdefault(loop, {})
+    key = (api_base, api_key, max_connections, max_keepalive_connections)
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = _build_client(*key)
+    return client
+
 
 class AnthropicClient(LLMClientBase):
     """LLM client using Anthropic's protocol.
@@ -29,6 +81,9 @@ class AnthropicClient(LLMClientBase):
         api_base: str = "https://api.minimaxi.com/anthropic",
         model: str = "MiniMax-M2.5",
         retry_config: RetryConfig | None = None,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
     ):
         """Initialize Anthropic client.
 
@@ -37,15 +92,47 @@ class AnthropicClient(LLMClientBase):
             api_base: Base URL for the API (default: MiniMax Anthropic endpoint)
             model: Model name to use (default: MiniMax-M2.5)
             retry_config: Optional retry configuration
+            max_tokens: Maximum tokens to generate per response
+            max_connections: Maximum concurrent connections in the HTTP pool
+            max_keepalive_connections: Maximum idle connections kept open for reuse
         """
         super().__init__(api_key, api_base, model, retry_config)
 
-        # Initialize Anthropic async client
-        self.client = anthropic.AsyncAnthropic(
-            base_url=api_base,
-            api_key=api_key,
-            default_headers={"Authorization": f"Bearer {api_key}"},
-        )
+        # Parameters common to every request, built once
+        self._base_params: dict[str, Any] = {"model": model, "max_tokens": max_tokens}
+
+        # The SDK client is looked up on first use, inside the event loop it serves
+        self._client_key = (api_base, api_key, max_connections, max_keepalive_connections)
+        self._client: anthropic.AsyncAnthropic | None = None
+
+        # Converted tool schemas keyed by the identities of the tools passed in
+        self._tools_cache: dict[tuple[int, ...], tuple[list[Any], list[dict[str, Any]]]] = {}
+
+    @property
+    def client(self) -> anthropic.AsyncAnthropic:
+        """Anthropic async client, shared with other instances for the same endpoint."""
+        if self._client is None:
+            self._client = _shared_client(*self._client_key)
+        return self._client
+
+    @client.setter
+    def client(self, client: anthropic.AsyncAnthropic):
+        self._client = client
+
+    async def aclose(self):
+        """Release this instance's SDK client.
+
+        The connection pool is shared, so it stays open for other instances;
+        use shutdown_all() to close every pool.
+        """
+        self._client = None
+
+    @classmethod
+    async def shutdown_all(cls):
+        """Close all shared SDK clients created in the running event loop."""
+        clients = _CLIENT_CACHE.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.close()
 
     async def _make_api_request(
         self,
@@ -66,11 +153,29 @@ class AnthropicClient(LLMClientBase):
         Raises:
             Exception: API call failed
         """
-        params = {
-            "model": self.model,
-            "max_tokens": 16384,
-            "messages": api_messages,
-        }
+        params = self._request_params(system_message, api_messages, tools)
+
+        # Use Anthropic SDK's async messages.create
+        response = await self.client.messages.create(**params)
+        return response
+
+    def _request_params(
+        self,
+        system_message: str | None,
+        api_messages: list[dict[str, Any]],
+        tools: list[Any] | None = None,
+    ) -> dict[str, Any]:
+        """Build the Messages API parameters shared by all request paths.
+
+        Args:
+            system_message: Optional system message
+            api_messages: List of messages in Anthropic format
+            tools: Optional list of tools
+
+        Returns:
+            Keyword arguments for messages.create / messages.stream
+        """
+        params = {**self._base_params, "messages": api_messages}
 
         if system_message:
             params["system"] = system_message
@@ -78,9 +183,7 @@ class AnthropicClient(LLMClientBase):
         if tools:
             params["tools"] = self._convert_tools(tools)
 
-        # Use Anthropic SDK's async messages.create
-        response = await self.client.messages.create(**params)
-        return response
+        return params
 
     def _convert_tools(self, tools: list[Any]) -> list[dict[str, Any]]:
         """Convert tools to Anthropic format.
@@ -102,6 +205,13 @@ class AnthropicClient(LLMClientBase):
         Returns:
             List of tools in Anthropic dict format
         """
+        # Agents pass the same tool objects every step, so convert each set once.
+        # The cache entry holds the tools themselves, so their ids can't be reused.
+        key = tuple(map(id, tools))
+        cached = self._tools_cache.get(key)
+        if cached is not None:
+            return cached[1]
+
         result = []
         for tool in tools:
             if isinstance(tool, dict):
@@ -111,11 +221,21 @@ class AnthropicClient(LLMClientBase):
                 result.append(tool.to_schema())
             else:
                 raise TypeError(f"Unsupported tool type: {type(tool)}")
+
+        if len(self._tools_cache) >= _TOOLS_CACHE_SIZE:
+            # Evict the oldest tool set
+            del self._tools_cache[next(iter(self._tools_cache))]
+        self._tools_cache[key] = (list(tools), result)
         return result
 
     def _convert_messages(self, messages: list[Message]) -> tuple[str | None, list[dict[str, Any]]]:
         """Convert internal messages to Anthropic format.
 
+        A system message is only recognized at the head of the list; any later
+        one is dropped like other roles Anthropic doesn't take. Each message's
+        converted form is cached on the message, so a long history only pays
+        for the messages added since the last request.
+
         Args:
             messages: List of internal Message objects
 
@@ -125,59 +245,74 @@ class AnthropicClient(LLMClientBase):
         system_message = None
         api_messages = []
 
-        for msg in messages:
-            if msg.role == "system":
-                system_message = msg.content
-                continue
+        # The system prompt is always the first message, so only the head is checked
+        start = 0
+        if messages and messages[0].role == "system":
+            system_message = messages[0].content
+            start = 1
+
+        for msg in islice(messages, start, None):
+            api_message = msg.converted("anthropic", self._convert_message)
+            if api_message is not None:
+                api_messages.append(api_message)
+
+        return system_message, api_messages
+
+    @staticmethod
+    def _convert_message(msg: Message) -> dict[str, Any] | None:
+        """Convert a single non-system message to Anthropic format.
+
+        Args:
+            msg: Internal Message object
+
+        Returns:
+            Anthropic message dict, or None for roles Anthropic doesn't take
+        """
+        # For user and assistant messages
+        if msg.role in ["user", "assistant"]:
+            # Handle assistant messages with thinking or tool calls
+            if msg.role == "assistant" and (msg.thinking or msg.tool_calls):
+                # Build content blocks for assistant with thinking and/or tool calls
+                content_blocks = []
+
+                # Add thinking block if present
+                if msg.thinking:
+                    content_blocks.append({"type": "thinking", "thinking": msg.thinking})
+
+                # Add text content if present
+                if msg.content:
+                    content_blocks.append({"type": "text", "text": msg.content})
+
+                # Add tool use blocks (built once: the whole message is cached)
+                if msg.tool_calls:
+                    content_blocks.extend(
+                        {
+                            "type": "tool_use",
+                            "id": tool_call.id,
+                            "name": tool_call.function.name,
+                            "input": tool_call.function.arguments,
+                        }
+                        for tool_call in msg.tool_calls
+                    )
 
-            # For user and assistant messages
-            if msg.role in ["user", "assistant"]:
-                # Handle assistant messages with thinking or tool calls
-                if msg.role == "assistant" and (msg.thinking or msg.tool_calls):
-                    # Build content blocks for assistant with thinking and/or tool calls
-                    content_blocks = []
-
-                    # Add thinking block if present
-                    if msg.thinking:
-                        content_blocks.append({"type": "thinking", "thinking": msg.thinking})
-
-                    # Add text content if present
-                    if msg.content:
-                        content_blocks.append({"type": "text", "text": msg.content})
-
-                    # Add tool use blocks
-                    if msg.tool_calls:
-                        for tool_call in msg.tool_calls:
-                            content_blocks.append(
-                                {
-                                    "type": "tool_use",
-                                    "id": tool_call.id,
-                                    "name": tool_call.function.name,
-                                    "input": tool_call.function.arguments,
-                                }
-                            )
-
-                    api_messages.append({"role": "assistant", "content": content_blocks})
-                else:
-                    api_messages.append({"role": msg.role, "content": msg.content})
-
-            # For tool result messages
-            elif msg.role == "tool":
-                # Anthropic uses user role with tool_result content blocks
-                api_messages.append(
+                return {"role": "assistant", "content": content_blocks}
+            return {"role": msg.role, "content": msg.content}
+
+        # For tool result messages
+        if msg.role == "tool":
+            # Anthropic uses user role with tool_result content blocks
+            return {
+                "role": "user",
+                "content": [
                     {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "tool_result",
-                                "tool_use_id": msg.tool_call_id,
-                                "content": msg.content,
-                            }
-                        ],
+                        "type": "tool_result",
+                        "tool_use_id": msg.tool_call_id,
+                        "content": msg.content,
                     }
-                )
+                ],
+            }
 
-        return system_message, api_messages
+        return None
 
     def _prepare_request(
         self,
@@ -211,15 +346,15 @@ class AnthropicClient(LLMClientBase):
             LLMResponse object
         """
         # Extract text content, thinking, and tool calls
-        text_content = ""
-        thinking_content = ""
+        text_parts: list[str] = []
+        thinking_parts: list[str] = []
         tool_calls = []
 
         for block in response.content:
             if block.type == "text":
-                text_content += block.text
+                text_parts.append(block.text)
             elif block.type == "thinking":
-                thinking_content += block.thinking
+                thinking_parts.append(block.thinking)
             elif block.type == "tool_use":
                 # Parse Anthropic tool_use block
                 tool_calls.append(
@@ -248,6 +383,9 @@ class AnthropicClient(LLMClientBase):
                 total_tokens=total_input_tokens + output_tokens,
             )
 
+        text_content = "".join(text_parts)
+        thinking_content = "".join(thinking_parts)
+
         return LLMResponse(
             content=text_content,
             thinking=thinking_content if thinking_content else None,
@@ -272,23 +410,65 @@ class AnthropicClient(LLMClientBase):
         Returns:
             Async iterator of Anthropic Message response events
         """
-        params = {
-            "model": self.model,
-            "max_tokens": 16384,
-            "messages": api_messages,
-        }
-
-        if system_message:
-            params["system"] = system_message
-
-        if tools:
-            params["tools"] = self._convert_tools(tools)
+        params = self._request_params(system_message, api_messages, tools)
 
         # Use Anthropic SDK's async messages.stream for streaming
         async with self.client.messages.stream(**params) as stream:
             async for event in stream:
                 yield event
 
+    async def _make_streaming_request_with_retry(
+        self,
+        system_message: str | None,
+        api_messages: list[dict[str, Any]],
+        tools: list[Any] | None = None,
+    ):
+        """Execute streaming API request, retrying failures before the first event.
+
+        ``async_retry`` can only retry a call that returns, so the stream is
+        retried here instead: each attempt reopens it. Once an event has been
+        passed on, the caller has already shown or recorded it, so later
+        errors are raised rather than replaying the response from the start.
+
+        Args:
+            system_message: Optional system message
+            api_messages: List of messages in Anthropic format
+            tools: Optional list of tools
+
+        Returns:
+            Async iterator of Anthropic Message response events
+        """
+        config = self.retry_config
+        attempt = 0
+        while True:
+            started = False
+            try:
+                async for event in self._make_streaming_request(system_message, api_messages, tools):
+                    started = True
+                    yield event
+                return
+            except config.retryable_exceptions as e:
+                if started:
+                    raise
+                if attempt >= config.max_retries:
+                    logger.error("流式请求重试失败 | 已达最大重试次数 %d", config.max_retries)
+                    raise RetryExhaustedError(e, attempt + 1)
+                delay = config.calculate_delay(attempt)
+                logger.warning("流式请求第 %d 次失败: %s | %.2f 秒后重试", attempt + 1, e, delay)
+                if self.retry_callback:
+                    self.retry_callback(e, attempt + 1)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    @staticmethod
+    def _parse_tool_arguments(parts: list[str]) -> dict[str, Any]:
+        """Parse a tool call's streamed input JSON fragments into arguments."""
+        arguments = "".join(parts)
+        try:
+            return json_loads(arguments) if arguments else {}
+        except json.JSONDecodeError:
+            return {}
+
     async def stream_generate(
         self,
         messages: list[Message],
@@ -307,109 +487,165 @@ class AnthropicClient(LLMClientBase):
         """
         request_params = self._prepare_request(messages, tools)
 
+        stream_args = (
+            request_params["system_message"],
+            request_params["api_messages"],
+            request_params["tools"],
+        )
         if self.retry_config.enabled:
-            async def streaming_call():
-                return self._make_streaming_request(
-                    request_params["system_message"],
-                    request_params["api_messages"],
-                    request_params["tools"],
-                )
-            
-            retry_decorator = async_retry(config=self.retry_config, on_retry=self.retry_callback)
-            wrapped_stream = retry_decorator(streaming_call)
-            stream_iterator = await wrapped_stream()
+            stream_iterator = self._make_streaming_request_with_retry(*stream_args)
         else:
-            stream_iterator = self._make_streaming_request(
-                request_params["system_message"],
-                request_params["api_messages"],
-                request_params["tools"],
-            )
+            stream_iterator = self._make_streaming_request(*stream_args)
+
+        # Bound once: the streaming loop logs thinking transitions per response
+        log_info = logger.info
+        info_enabled = logger.isEnabledFor(logging.INFO)
 
-        content_length = 0
-        thinking_length = 0
-        tool_calls_data = {}
+        # Indexed by content block index; slots of text/thinking blocks stay None
+        tool_calls_data: list[dict[str, Any] | None] = []
         event_count = 0
         thinking_started = False
         thinking_start_time = None
         thinking_duration_value = None
-        full_thinking = ""
-        full_content = ""
+        # Streamed text is collected as parts and joined once at the end
+        thinking_parts: list[str] = []
+        content_parts: list[str] = []
+        input_tokens = 0
+        output_tokens = 0
+        has_usage = False
+        finish_reason = "stop"
         
         async for event in stream_iterator:
             event_count += 1
-            
-            if event_count <= 10:
-                logger.debug(f"event {event_count}: type={event.type}")
-            
-            if event.type == "content_block_delta":
-                if event.delta.type == "text_delta":
+            # Read each attribute once into locals; deltas are the hot path
+            event_type = event.type
+
+            if event_type == "content_block_delta":
+                delta = event.delta
+                delta_type = delta.type
+                if delta_type == "text_delta":
                     if thinking_started and thinking_start_time:
                         thinking_duration_value = round(time.time() - thinking_start_time, 1)
-                        logger.info(f"思考结束 | 用时: {thinking_duration_value}s")
+                        if info_enabled:
+                            log_info("思考结束 | 用时: %ss", thinking_duration_value)
                         yield {"type": "thinking_end", "duration": thinking_duration_value}
                         thinking_started = False
-                    content_length += len(event.delta.text)
-                    full_content += event.delta.text
-                    yield {"type": "content", "content": event.delta.text}
-                elif event.delta.type == "thinking_delta":
+                    text = delta.text
+                    content_parts.append(text)
+                    yield {"type": "content", "content": text}
+                elif delta_type == "thinking_delta":
+                    if not thinking_started:
+                        thinking_started = True
+                        thinking_start_time = time.time()
+                        if info_enabled:
+                            log_info("思考开始")
+                        yield {"type": "thinking_start", "content": ""}
+                    thinking = delta.thinking
+                    thinking_parts.append(thinking)
+                    yield {"type": "thinking", "content": thinking}
+                elif delta_type == "input_json_delta":
+                    try:
+                        tool_call_data = tool_calls_data[event.index]
+                    except (AttributeError, IndexError):
+                        continue
+                    if tool_call_data is None:
+                        continue
+                    # The SDK always delivers input_json_delta fragments as str
+                    partial_json = delta.partial_json
+                    tool_call_data["arguments"].append(partial_json)
+                    yield {
+                        "type": "tool_call_args",
+                        "tool_call_id": tool_call_data["id"],
+                        "arguments": partial_json,
+                    }
+
+            elif event_type == "content_block_stop":
+                # A tool's input is complete once its block stops: parse it now,
+                # while later blocks are still streaming, rather than at the end
+                try:
+                    tool_call_data = tool_calls_data[event.index]
+                except (AttributeError, IndexError):
+                    continue
+                if tool_call_data is not None and tool_call_data["input"] is None:
+                    tool_call_data["input"] = self._parse_tool_arguments(tool_call_data["arguments"])
+
+            elif event_type == "message_start":
+                message_usage = getattr(event.message, "usage", None)
+                if message_usage:
+                    has_usage = True
+                    input_tokens = (
+                        (message_usage.input_tokens or 0)
+                        + (getattr(message_usage, "cache_read_input_tokens", 0) or 0)
+                        + (getattr(message_usage, "cache_creation_input_tokens", 0) or 0)
+                    )
+                    output_tokens = getattr(message_usage, "output_tokens", 0) or 0
+
+            elif event_type == "message_delta":
+                if getattr(event, "usage", None):
+                    has_usage = True
+                    output_tokens = event.usage.output_tokens or output_tokens
+                if getattr(event.delta, "stop_reason", None):
+                    finish_reason = event.delta.stop_reason
+
+            elif event_type == "content_block_start":
+                block = event.content_block
+                if not block:
+                    continue
+                block_type = block.type
+                if block_type == "thinking":
                     if not thinking_started:
                         thinking_started = True
                         thinking_start_time = time.time()
-                        logger.info(f"思考开始")
+                        if info_enabled:
+                            log_info("思考开始")
                         yield {"type": "thinking_start", "content": ""}
-                    thinking_length += len(event.delta.thinking)
-                    full_thinking += event.delta.thinking
-                    yield {"type": "thinking", "content": event.delta.thinking}
-                elif event.delta.type == "input_json_delta":
-                    if hasattr(event, 'index'):
+                    thinking = getattr(block, "thinking", None)
+                    if thinking:
+                        thinking_parts.append(thinking)
+                        yield {"type": "thinking", "content": thinking}
+                elif block_type == "text":
+                    if thinking_started and thinking_start_time:
+                        thinking_duration_value = round(time.time() - thinking_start_time, 1)
+                        if info_enabled:
+                            log_info("思考结束 | 用时: %ss", thinking_duration_value)
+                        yield {"type": "thinking_end", "duration": thinking_duration_value}
+                        thinking_started = False
+                    text = getattr(block, "text", None)
+                    if text:
+                        content_parts.append(text)
+                        yield {"type": "content", "content": text}
+                elif block_type == "tool_use":
+                    try:
                         idx = event.index
-                        if idx in tool_calls_data:
-                            partial_json = getattr(event.delta, 'partial_json', '')
-                            if isinstance(partial_json, dict):
-                                partial_json = json.dumps(partial_json)
-                            tool_calls_data[idx]["arguments"] += str(partial_json)
-            
-            elif event.type == "content_block_start":
-                if hasattr(event, "content_block") and event.content_block:
-                    if event.content_block.type == "thinking":
-                        if not thinking_started:
-                            thinking_started = True
-                            thinking_start_time = time.time()
-                            logger.info(f"思考开始")
-                            yield {"type": "thinking_start", "content": ""}
-                        if hasattr(event.content_block, "thinking"):
-                            thinking_length += len(event.content_block.thinking)
-                            full_thinking += event.content_block.thinking
-                            yield {"type": "thinking", "content": event.content_block.thinking}
-                    elif event.content_block.type == "text":
-                        if thinking_started and thinking_start_time:
-                            thinking_duration_value = round(time.time() - thinking_start_time, 1)
-                            logger.info(f"思考结束 | 用时: {thinking_duration_value}s")
-                            yield {"type": "thinking_end", "duration": thinking_duration_value}
-                            thinking_started = False
-                        if hasattr(event.content_block, "text"):
-                            content_length += len(event.content_block.text)
-                            full_content += event.content_block.text
-                            yield {"type": "content", "content": event.content_block.text}
-                    elif event.content_block.type == "tool_use":
-                        idx = event.index if hasattr(event, 'index') else len(tool_calls_data)
-                        tool_calls_data[idx] = {
-                            "id": event.content_block.id,
-                            "name": event.content_block.name,
-                            "arguments": ""
-                        }
-                        yield {
-                            "type": "tool_call_start",
-                            "tool_name": event.content_block.name,
-                            "tool_call_id": event.content_block.id
-                        }
+                    except AttributeError:
+                        idx = len(tool_calls_data)
+                    if idx >= len(tool_calls_data):
+                        tool_calls_data.extend([None] * (idx + 1 - len(tool_calls_data)))
+                    tool_calls_data[idx] = {
+                        "id": block.id,
+                        "name": block.name,
+                        "arguments": [],
+                        "input": None,
+                    }
+                    yield {
+                        "type": "tool_call_start",
+                        "tool_name": block.name,
+                        "tool_call_id": block.id
+                    }
         
+        full_content = "".join(content_parts)
+        full_thinking = "".join(thinking_parts)
+        content_length = len(full_content)
+        thinking_length = len(full_thinking)
+
         tool_calls = []
-        for idx, tc in tool_calls_data.items():
-            try:
-                args = json.loads(tc["arguments"]) if tc["arguments"] else {}
-            except json.JSONDecodeError:
-                args = {}
+        for tc in tool_calls_data:
+            if tc is None:
+                continue
+            # Inputs are normally parsed at content_block_stop already
+            args = tc["input"]
+            if args is None:
+                args = self._parse_tool_arguments(tc["arguments"])
             tool_calls.append({
                 "id": tc["id"],
                 "name": tc["name"],
@@ -418,20 +654,47 @@ class AnthropicClient(LLMClientBase):
         
         if thinking_started and thinking_start_time:
             thinking_duration_value = round(time.time() - thinking_start_time, 1)
-            logger.info(f"思考结束 | 用时: {thinking_duration_value}s")
+            if info_enabled:
+                log_info("思考结束 | 用时: %ss", thinking_duration_value)
             yield {"type": "thinking_end", "duration": thinking_duration_value}
         
-        logger.info(f"完成 | content={content_length} | thinking={thinking_length} | thinking_duration={thinking_duration_value} | tool_calls={len(tool_calls)}")
-        
-        if full_thinking:
-            logger.info(f"思考内容:\n{full_thinking}")
-        if full_content:
-            logger.info(f"正式内容:\n{full_content}")
-        if tool_calls:
+        if info_enabled:
+            log_info(
+                "完成 | events=%d | content=%d | thinking=%d | thinking_duration=%s | tool_calls=%d",
+                event_count, content_length, thinking_length, thinking_duration_value, len(tool_calls),
+            )
+            if full_thinking:
+                log_info("思考内容:\n%s", full_thinking)
+            if full_content:
+                log_info("正式内容:\n%s", full_content)
             for tc in tool_calls:
-                logger.info(f"工具调用: {tc['name']} | 参数: {json.dumps(tc['arguments'], ensure_ascii=False)}")
+                log_info("工具调用: %s | 参数: %s", tc["name"], json_dumps(tc["arguments"]))
         
-        yield {"type": "done", "tool_calls": tool_calls}
+        usage = None
+        if has_usage:
+            usage = TokenUsage(
+                prompt_tokens=input_tokens,
+                completion_tokens=output_tokens,
+                total_tokens=input_tokens + output_tokens,
+            )
+
+        response = LLMResponse(
+            content=full_content,
+            thinking=full_thinking or None,
+            tool_calls=[
+                ToolCall(
+                    id=tc["id"],
+                    type="function",
+                    function=FunctionCall(name=tc["name"], arguments=tc["arguments"]),
+                )
+                for tc in tool_calls
+            ]
+            or None,
+            finish_reason=finish_reason,
+            usage=usage,
+        )
+
+        yield {"type": "done", "tool_calls": tool_calls, "usage": usage, "finish_reason": finish_reason, "response": response}
 
     async def generate(
         self,
@@ -472,3 +735,55 @@ class AnthropicClient(LLMClientBase):
 
         # Parse and return response
         return self._parse_response(response)
+
+    async def submit_batch(self, requests: list[tuple[str, list[Message], list[Any] | None]]) -> str:
+        """Submit independent requests through the Message Batches API.
+
+        Batches are processed asynchronously (results can take up to 24h) at
+        a lower token price, so this is only for offline bulk work such as
+        evaluations or replays, never for interactive sessions. The endpoint
+        must support the Batches API; Anthropic-compatible gateways may not.
+
+        Args:
+            requests: List of (custom_id, messages, tools); custom_id must be
+                unique within the batch and is used to match results
+
+        Returns:
+            The batch ID, to pass to poll_batch
+        """
+        batch_requests = []
+        for custom_id, messages, tools in requests:
+            system_message, api_messages = self._convert_messages(messages)
+            batch_requests.append(
+                {
+                    "custom_id": custom_id,
+                    "params": self._request_params(system_message, api_messages, tools),
+                }
+            )
+
+        batch = await self.client.messages.batches.create(requests=batch_requests)
+        logger.info("批处理已提交 | id=%s | requests=%d", batch.id, len(batch_requests))
+        return batch.id
+
+    async def poll_batch(self, batch_id: str) -> dict[str, LLMResponse] | None:
+        """Fetch the results of a batch submitted with submit_batch.
+
+        Args:
+            batch_id: ID returned by submit_batch
+
+        Returns:
+            None while the batch is still processing; once it has ended, a
+            dict of custom_id to LLMResponse for the requests that succeeded
+            (errored, cancelled and expired requests are logged and left out)
+        """
+        batch = await self.client.messages.batches.retrieve(batch_id)
+        if batch.processing_status != "ended":
+            return None
+
+        results: dict[str, LLMResponse] = {}
+        async for entry in await self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = self._parse_response(entry.result.message)
+            else:
+                logger.warning("批处理请求未成功 | id=%s | custom_id=%s | result=%s", batch_id, entry.custom_id, entry.result.type)
+        return results
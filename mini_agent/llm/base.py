@@ -1,11 +1,142 @@
 """Base class for LLM clients."""
 
+import asyncio
+import importlib.util
 from abc import ABC, abstractmethod
-from typing import Any, AsyncGenerator
+from typing import Any, AsyncGenerator, AsyncIterator
 
 from ..retry import RetryConfig
 from ..schema import LLMResponse, Message
 
+# Connection pool ceilings for the provider SDKs' httpx clients
+DEFAULT_MAX_CONNECTIONS = 2000
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 500
+
+# httpx only speaks HTTP/2 when the optional h2 package is installed
+# (``pip install mini-agent[fast]``)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Streamed text deltas are merged until this many characters are pending, or
+# until this many milliseconds have passed since the last text event
+DEFAULT_STREAM_BATCH_CHARS = 64
+DEFAULT_STREAM_BATCH_MS = 25.0
+
+_TEXT_EVENT_TYPES = ("content", "thinking")
+
+# Queue markers used by coalesce_text_events: held text is due, source exhausted
+_FLUSH = object()
+_END = object()
+
+
+async def coalesce_text_events(
+    events: AsyncIterator[dict[str, Any]],
+    max_chars: int = DEFAULT_STREAM_BATCH_CHARS,
+    max_ms: float = DEFAULT_STREAM_BATCH_MS,
+) -> AsyncGenerator[dict[str, Any], None]:
+    """Merge runs of content (or thinking) events from a stream_generate stream.
+
+    The first text event is passed on at once. Later ones are held until
+    max_chars characters are pending or max_ms has passed since the last text
+    event was yielded; held text is flushed on time even if the upstream
+    stalls. Pending text is always yielded before any other event (and before
+    text of the other type), so event order is preserved.
+
+    Args:
+        events: Events from stream_generate
+        max_chars: Pending characters that force a yield (<= 1 disables merging)
+        max_ms: Longest time text is held before it is yielded
+
+    Yields:
+        The same events, with consecutive text deltas joined
+    """
+    if max_chars <= 1:
+        async for event in events:
+            yield event
+        return
+
+    loop = asyncio.get_running_loop()
+    max_delay = max_ms / 1000
+    pending_type: str | None = None
+    parts: list[str] = []
+    size = 0
+    next_flush = 0.0
+
+    # One reader task drains the source into a queue; a single timer, armed
+    # only while text is held, puts _FLUSH there when the deadline passes
+    queue: asyncio.Queue = asyncio.Queue()
+    timer: asyncio.TimerHandle | None = None
+
+    async def read():
+        try:
+            async for event in events:
+                queue.put_nowait(event)
+        except BaseException as e:
+            # Re-raised by the consumer; the reader only re-raises its own cancellation
+            queue.put_nowait(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            queue.put_nowait(_END)
+
+    reader = loop.create_task(read())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _FLUSH:
+                timer = None
+                if parts:
+                    yield {"type": pending_type, "content": "".join(parts)}
+                    parts.clear()
+                    size = 0
+                    next_flush = loop.time() + max_delay
+                continue
+            if item is _END:
+                break
+            if isinstance(item, BaseException):
+                raise item
+
+            event_type = item["type"]
+            if event_type in _TEXT_EVENT_TYPES:
+                if parts and event_type != pending_type:
+                    yield {"type": pending_type, "content": "".join(parts)}
+                    parts.clear()
+                    size = 0
+                pending_type = event_type
+                text = item["content"]
+                parts.append(text)
+                size += len(text)
+                now = loop.time()
+                if size >= max_chars or now >= next_flush:
+                    yield {"type": pending_type, "content": "".join(parts)}
+                    parts.clear()
+                    size = 0
+                    next_flush = now + max_delay
+                    if timer is not None:
+                        timer.cancel()
+                        timer = None
+                elif timer is None:
+                    timer = loop.call_at(next_flush, queue.put_nowait, _FLUSH)
+                continue
+
+            if parts:
+                yield {"type": pending_type, "content": "".join(parts)}
+                parts.clear()
+                size = 0
+            yield item
+
+        if parts:
+            yield {"type": pending_type, "content": "".join(parts)}
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if not reader.done():
+            reader.cancel()
+            # Let the read unwind before closing the stream it runs in
+            await asyncio.wait({reader})
+        aclose = getattr(events, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
 
 class LLMClientBase(ABC):
     """Abstract base class for LLM clients.
@@ -37,6 +168,22 @@ class LLMClientBase(ABC):
         # Callback for tracking retry count
         self.retry_callback = None
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # Only drops this instance's reference; see aclose()
+        await self.aclose()
+
+    async def aclose(self):
+        """Drop this instance's reference to its SDK client.
+
+        Connection pools are shared per event loop by every client with the
+        same endpoint, so this does not close any connection. Call the
+        provider client's shutdown_all() (or LLMClient.shutdown_all()) on
+        application shutdown to close the pools.
+        """
+
     @abstractmethod
     async def generate(
         self,
@@ -76,10 +223,37 @@ class LLMClientBase(ABC):
             - {"type": "thinking", "content": str}
             - {"type": "tool_call_start", "tool_name": str, "tool_call_id": str}
             - {"type": "tool_call_args", "arguments": str, "tool_call_id": str}
-            - {"type": "done", "tool_calls": list}
+            - {"type": "done", "tool_calls": list, "usage": TokenUsage | None, "finish_reason": str,
+               "response": LLMResponse}  # response is the fully assembled result of the stream
         """
         pass
 
+    async def batch_generate(
+        self,
+        batch: list[tuple[list[Message], list[Any] | None]],
+        max_concurrency: int = 32,
+    ) -> list[LLMResponse]:
+        """Generate responses for several independent requests concurrently.
+
+        Only for requests that don't depend on each other's output (e.g.
+        summarizing separate chunks); results are returned in input order.
+        If any request fails, its exception is raised.
+
+        Args:
+            batch: List of (messages, tools) pairs, one per request
+            max_concurrency: Maximum number of requests in flight at once
+
+        Returns:
+            List of LLMResponse, one per request, in the order given
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def generate_one(messages: list[Message], tools: list[Any] | None) -> LLMResponse:
+            async with semaphore:
+                return await self.generate(messages, tools)
+
+        return list(await asyncio.gather(*(generate_one(messages, tools) for messages, tools in batch)))
+
     @abstractmethod
     def _prepare_request(
         self,
@@ -10,7 +10,7 @@ from typing import Any, AsyncGenerator
 from ..retry import RetryConfig
 from ..schema import LLMProvider, LLMResponse, Message
 from .anthropic_client import AnthropicClient
-from .base import LLMClientBase
+from .base import DEFAULT_STREAM_BATCH_CHARS, DEFAULT_STREAM_BATCH_MS, LLMClientBase, coalesce_text_events
 from .openai_client import OpenAIClient
 
 logger = logging.getLogger(__name__)
@@ -101,6 +101,27 @@ class LLMClient:
 
         logger.info("Initialized LLM client with provider: %s, api_base: %s", provider, full_api_base)
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # Only drops the underlying client's reference; see aclose()
+        await self.aclose()
+
+    async def aclose(self):
+        """Drop the underlying client's reference to its SDK client.
+
+        Connection pools are shared per event loop, so this does not close
+        any connection; use shutdown_all() for that.
+        """
+        await self._client.aclose()
+
+    @staticmethod
+    async def shutdown_all():
+        """Close all shared connection pools created in the running event loop."""
+        await AnthropicClient.shutdown_all()
+        await OpenAIClient.shutdown_all()
+
     @property
     def retry_callback(self):
         """Get retry callback."""
@@ -129,21 +150,45 @@ class LLMClient:
         """
         return await self._client.generate(messages, tools, enable_deep_think)
 
+    async def batch_generate(
+        self,
+        batch: list[tuple[list[Message], list[Any] | None]],
+        max_concurrency: int = 32,
+    ) -> list[LLMResponse]:
+        """Generate responses for several independent requests concurrently.
+
+        Args:
+            batch: List of (messages, tools) pairs, one per request
+            max_concurrency: Maximum number of requests in flight at once
+
+        Returns:
+            List of LLMResponse in the same order as batch
+        """
+        return await self._client.batch_generate(batch, max_concurrency)
+
     async def stream_generate(
         self,
         messages: list[Message],
         tools: list[Any] | None = None,
         enable_deep_think: bool = False,
+        batch_chars: int = DEFAULT_STREAM_BATCH_CHARS,
+        batch_ms: float = DEFAULT_STREAM_BATCH_MS,
     ) -> AsyncGenerator[dict[str, Any], None]:
         """Stream generate response from LLM.
 
+        Consecutive content and thinking deltas are merged into fewer events;
+        see coalesce_text_events.
+
         Args:
             messages: List of conversation messages
             tools: Optional list of Tool objects or dicts
             enable_deep_think: Whether to enable deep thinking mode
+            batch_chars: Pending characters that force a text event (<= 1: one event per delta)
+            batch_ms: Milliseconds between merged text events
 
         Yields:
             Dict with type and content
         """
-        async for chunk in self._client.stream_generate(messages, tools, enable_deep_think):
+        stream = self._client.stream_generate(messages, tools, enable_deep_think)
+        async for chunk in coalesce_text_events(stream, batch_chars, batch_ms):
             yield chunk
@@ -1,18 +1,148 @@
 """OpenAI LLM client implementation."""
 
+import asyncio
+import hashlib
 import json
 import logging
 import time
-from typing import Any, AsyncGenerator
+import weakref
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Awaitable, Callable
 
-from openai import AsyncOpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from openai.types.chat import ChatCompletion
 
 from ..retry import RetryConfig, async_retry
 from ..schema import FunctionCall, LLMResponse, Message, TokenUsage, ToolCall
-from .base import LLMClientBase
+from ..utils import json_dumps, json_dumps_canonical, json_loads
+from .base import DEFAULT_MAX_CONNECTIONS, DEFAULT_MAX_KEEPALIVE_CONNECTIONS, HTTP2_AVAILABLE, LLMClientBase
+
+if TYPE_CHECKING:
+    from .response_cache import CacheBackend
+    from .semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
+# Number of distinct tool sets whose converted schemas each client remembers
+_TOOLS_CACHE_SIZE = 32
+
+# extra_body for each thinking mode, shared by every request. Treat as read-only:
+# the SDK merges extra_body into a new request body without modifying it.
+_EXTRA_BODY_DEEP_THINK = {"reasoning_split": True}
+_EXTRA_BODY_NO_THINK = {"reasoning_enabled": False}
+
+# SDK clients shared by all OpenAIClients with the same endpoint, key and
+# pool limits. Kept per event loop, since pooled connections can't cross loops.
+_CLIENT_CACHE: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, AsyncOpenAI]]" = weakref.WeakKeyDictionary()
+
+
+def _build_client(
+    api_base: str,
+    api_key: str,
+    max_connections: int,
+    max_keepalive_connections: int,
+    timeout: float | None = None,
+) -> AsyncOpenAI:
+    """Create an SDK client with its own connection pool."""
+    # SDK default httpx client (timeouts, redirects) with a larger pool
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        ),
+        # Concurrent requests share one connection where the server supports it
+        http2=HTTP2_AVAILABLE,
+    )
+    # None keeps the SDK's default request timeout
+    timeout_kwargs = {"timeout": timeout} if timeout is not None else {}
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=api_base,
+        http_client=http_client,
+        **timeout_kwargs,
+    )
+
+
+def _shared_client(
+    api_base: str,
+    api_key: str,
+    max_connections: int,
+    max_keepalive_connections: int,
+    timeout: float | None = None,
+) -> AsyncOpenAI:
+    """Get the SDK client shared within the running event loop, creating it if needed."""
+    key = (api_base, api_key, max_connections, max_keepalive_connections, timeout)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Outside a loop there's nothing safe to share with
+        return _build_client(*key)
+
+    # No await between lookup and insert, so no lock is needed
+    clients = _CLIENT_CACHE.setdefault(loop, {})
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = _build_client(*key)
+    return client
+
+
+def _message_json(msg: Message) -> dict[str, Any]:
+    # JSON-compatible dump of a message, for hashing
+    return msg.model_dump(mode="json")
+
+
+def _convert_system_message(msg: Message) -> dict[str, Any]:
+    # OpenAI includes system message in messages array
+    return {"role": "system", "content": msg.content}
+
+
+def _convert_user_message(msg: Message) -> dict[str, Any]:
+    return {"role": "user", "content": msg.content}
+
+
+def _convert_assistant_message(msg: Message) -> dict[str, Any]:
+    assistant_msg = {"role": "assistant"}
+
+    # Add content if present
+    if msg.content:
+        assistant_msg["content"] = msg.content
+
+    # Add tool calls if present
+    if msg.tool_calls:
+        assistant_msg["tool_calls"] = [
+            {
+                "id": tool_call.id,
+                "type": "function",
+                "function": {
+                    "name": tool_call.function.name,
+                    "arguments": json_dumps(tool_call.function.arguments),
+                },
+            }
+            for tool_call in msg.tool_calls
+        ]
+
+    # DeepSeek thinking mode: add reasoning_content for tool calls
+    if msg.thinking:
+        assistant_msg["reasoning_content"] = msg.thinking
+
+    return assistant_msg
+
+
+def _convert_tool_message(msg: Message) -> dict[str, Any]:
+    return {
+        "role": "tool",
+        "tool_call_id": msg.tool_call_id,
+        "content": msg.content,
+    }
+
+
+# OpenAI message builders by role; messages with other roles are skipped
+_MESSAGE_CONVERTERS: dict[str, Callable[[Message], dict[str, Any]]] = {
+    "system": _convert_system_message,
+    "user": _convert_user_message,
+    "assistant": _convert_assistant_message,
+    "tool": _convert_tool_message,
+}
 
 class OpenAIClient(LLMClientBase):
     """LLM client using OpenAI's protocol.
@@ -29,6 +159,12 @@ class OpenAIClient(LLMClientBase):
         api_base: str = "https://api.minimaxi.com/v1",
         model: str = "MiniMax-M2.5",
         retry_config: RetryConfig | None = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        timeout: float | None = None,
+        response_cache: "CacheBackend | None" = None,
+        semantic_cache: "SemanticCache | None" = None,
+        deduplicate_requests: bool = False,
     ):
         """Initialize OpenAI client.
 
@@ -37,26 +173,68 @@ class OpenAIClient(LLMClientBase):
             api_base: Base URL for the API (default: MiniMax OpenAI endpoint)
             model: Model name to use (default: MiniMax-M2.5)
             retry_config: Optional retry configuration
+            max_connections: Maximum concurrent connections in the HTTP pool
+            max_keepalive_connections: Maximum idle connections kept open for reuse
+            timeout: Request timeout in seconds (default: the SDK's own timeout)
+            response_cache: Optional exact-match cache for responses, keyed by a
+                            hash of the model, messages, tools and thinking mode
+            semantic_cache: Optional cache answering near-identical prompts without
+                            an API call (requests without tools or deep thinking only)
+            deduplicate_requests: Whether identical concurrent requests share one
+                                  API call (costs a hash of the history per request)
         """
         super().__init__(api_key, api_base, model, retry_config)
 
-        # Initialize OpenAI client
-        self.client = AsyncOpenAI(
-            api_key=api_key,
-            base_url=api_base,
-        )
+        # The SDK client is looked up on first use, inside the event loop it serves
+        self._client_key = (api_base, api_key, max_connections, max_keepalive_connections, timeout)
+        self._client: AsyncOpenAI | None = None
+
+        # Converted tool schemas keyed by the identities of the tools passed in
+        self._tools_cache: dict[tuple[int, ...], tuple[list[Any], list[dict[str, Any]]]] = {}
+
+        self.response_cache = response_cache
+        self.semantic_cache = semantic_cache
+        self.deduplicate_requests = deduplicate_requests
+        # Futures of requests in flight, keyed like the response cache
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """OpenAI async client, shared with other instances for the same endpoint."""
+        if self._client is None:
+            self._client = _shared_client(*self._client_key)
+        return self._client
+
+    @client.setter
+    def client(self, client: AsyncOpenAI):
+        self._client = client
+
+    async def aclose(self):
+        """Release this instance's SDK client.
+
+        The connection pool is shared, so it stays open for other instances;
+        use shutdown_all() to close every pool.
+        """
+        self._client = None
+
+    @classmethod
+    async def shutdown_all(cls):
+        """Close all shared SDK clients created in the running event loop."""
+        clients = _CLIENT_CACHE.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.close()
 
     async def _make_api_request(
         self,
         api_messages: list[dict[str, Any]],
-        tools: list[Any] | None = None,
+        api_tools: list[dict[str, Any]] | None = None,
         enable_deep_think: bool = False,
     ) -> Any:
         """Execute API request (core method that can be retried).
 
         Args:
             api_messages: List of messages in OpenAI format
-            tools: Optional list of tools
+            api_tools: Optional list of tools, already in OpenAI format
             enable_deep_think: Whether to enable deep thinking mode
 
         Returns:
@@ -65,27 +243,71 @@ class OpenAIClient(LLMClientBase):
         Raises:
             Exception: API call failed
         """
-        logger.info(f"开始API请求 | model={self.model} | messages={len(api_messages)} | deep_think={enable_deep_think}")
+        logger.info("开始API请求 | model=%s | messages=%d | deep_think=%s", self.model, len(api_messages), enable_deep_think)
+        
+        params = self._request_params(api_messages, api_tools, enable_deep_think)
+        response = await self.client.chat.completions.create(**params)
         
+        usage = getattr(response, "usage", None)
+        if usage:
+            logger.info("API响应 | prompt=%s | completion=%s | total=%s", usage.prompt_tokens, usage.completion_tokens, usage.total_tokens)
+        
+        return response
+
+    def _cache_key(
+        self,
+        messages: list[Message],
+        api_tools: list[dict[str, Any]] | None,
+        enable_deep_think: bool,
+    ) -> str:
+        """SHA-256 of everything that determines the request body.
+
+        Built from the Message models rather than the converted request, whose
+        tool-call arguments are already JSON strings from json_dumps (spelled
+        differently with and without orjson). Everything is encoded by
+        json_dumps_canonical, so processes sharing a RedisBackend agree on keys.
+        """
+        payload = {
+            "model": self.model,
+            "messages": [msg.converted("json", _message_json) for msg in messages],
+            "tools": api_tools,
+            "deep_think": enable_deep_think,
+        }
+        return hashlib.sha256(json_dumps_canonical(payload).encode()).hexdigest()
+
+    def _request_params(
+        self,
+        api_messages: list[dict[str, Any]],
+        api_tools: list[dict[str, Any]] | None,
+        enable_deep_think: bool,
+        stream: bool = False,
+    ) -> dict[str, Any]:
+        """Build the chat.completions parameters shared by all request paths.
+
+        Args:
+            api_messages: List of messages in OpenAI format
+            api_tools: Optional list of tools, already in OpenAI format
+            enable_deep_think: Whether to enable deep thinking mode
+            stream: Whether to request a streamed response
+
+        Returns:
+            Keyword arguments for chat.completions.create
+        """
         params = {
             "model": self.model,
             "messages": api_messages,
+            "extra_body": _EXTRA_BODY_DEEP_THINK if enable_deep_think else _EXTRA_BODY_NO_THINK,
         }
 
-        if enable_deep_think:
-            params["extra_body"] = {"reasoning_split": True}
-        else:
-            params["extra_body"] = {"reasoning_enabled": False}
+        if stream:
+            params["stream"] = True
+            # Ask for token usage in the final chunk so callers don't need a second request
+            params["stream_options"] = {"include_usage": True}
 
-        if tools:
-            params["tools"] = self._convert_tools(tools)
+        if api_tools:
+            params["tools"] = api_tools
 
-        response = await self.client.chat.completions.create(**params)
-        
-        if hasattr(response, 'usage') and response.usage:
-            logger.info(f"API响应 | prompt={response.usage.prompt_tokens} | completion={response.usage.completion_tokens} | total={response.usage.total_tokens}")
-        
-        return response
+        return params
 
     def _convert_tools(self, tools: list[Any]) -> list[dict[str, Any]]:
         """Convert tools to OpenAI format.
@@ -96,6 +318,13 @@ class OpenAIClient(LLMClientBase):
         Returns:
             List of tools in OpenAI dict format
         """
+        # Agents pass the same tools every step, so convert each set once.
+        # The cache entry holds the tools themselves, so their ids can't be reused.
+        key = tuple(map(id, tools))
+        cached = self._tools_cache.get(key)
+        if cached is not None:
+            return cached[1]
+
         result = []
         for tool in tools:
             if isinstance(tool, dict):
@@ -119,11 +348,19 @@ class OpenAIClient(LLMClientBase):
                 result.append(tool.to_openai_schema())
             else:
                 raise TypeError(f"Unsupported tool type: {type(tool)}")
+
+        if len(self._tools_cache) >= _TOOLS_CACHE_SIZE:
+            # Evict the oldest tool set
+            del self._tools_cache[next(iter(self._tools_cache))]
+        self._tools_cache[key] = (list(tools), result)
         return result
 
     def _convert_messages(self, messages: list[Message]) -> tuple[str | None, list[dict[str, Any]]]:
         """Convert internal messages to OpenAI format.
 
+        Each message's converted form is cached on the message, so a long
+        history only pays for the messages added since the last request.
+
         Args:
             messages: List of internal Message objects
 
@@ -132,59 +369,29 @@ class OpenAIClient(LLMClientBase):
             Note: OpenAI includes system message in the messages array
         """
         api_messages = []
+        append = api_messages.append
+        convert = self._convert_message
 
         for msg in messages:
-            if msg.role == "system":
-                # OpenAI includes system message in messages array
-                api_messages.append({"role": "system", "content": msg.content})
-                continue
-
-            # For user messages
-            if msg.role == "user":
-                api_messages.append({"role": "user", "content": msg.content})
-
-            # For assistant messages
-            elif msg.role == "assistant":
-                assistant_msg = {"role": "assistant"}
-
-                # Add content if present
-                if msg.content:
-                    assistant_msg["content"] = msg.content
-
-                # Add tool calls if present
-                if msg.tool_calls:
-                    tool_calls_list = []
-                    for tool_call in msg.tool_calls:
-                        tool_calls_list.append(
-                            {
-                                "id": tool_call.id,
-                                "type": "function",
-                                "function": {
-                                    "name": tool_call.function.name,
-                                    "arguments": json.dumps(tool_call.function.arguments),
-                                },
-                            }
-                        )
-                    assistant_msg["tool_calls"] = tool_calls_list
-
-                # DeepSeek thinking mode: add reasoning_content for tool calls
-                if msg.thinking:
-                    assistant_msg["reasoning_content"] = msg.thinking
-
-                api_messages.append(assistant_msg)
-
-            # For tool result messages
-            elif msg.role == "tool":
-                api_messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": msg.tool_call_id,
-                        "content": msg.content,
-                    }
-                )
+            api_message = msg.converted("openai", convert)
+            if api_message is not None:
+                append(api_message)
 
         return None, api_messages
 
+    @staticmethod
+    def _convert_message(msg: Message) -> dict[str, Any] | None:
+        """Convert a single message to OpenAI format.
+
+        Args:
+            msg: Internal Message object
+
+        Returns:
+            OpenAI message dict, or None for unknown roles
+        """
+        converter = _MESSAGE_CONVERTERS.get(msg.role)
+        return converter(msg) if converter is not None else None
+
     def _prepare_request(
         self,
         messages: list[Message],
@@ -226,19 +433,22 @@ class OpenAIClient(LLMClientBase):
         text_content = message.content or ""
 
         # Extract thinking content from reasoning_details (only if deep think is enabled)
-        thinking_content = ""
-        if enable_deep_think and hasattr(message, "reasoning_details") and message.reasoning_details:
+        thinking_parts: list[str] = []
+        reasoning_details = getattr(message, "reasoning_details", None) if enable_deep_think else None
+        if reasoning_details:
             # reasoning_details is a list of reasoning blocks
-            for detail in message.reasoning_details:
-                if hasattr(detail, "text"):
-                    thinking_content += detail.text
+            for detail in reasoning_details:
+                text = getattr(detail, "text", None)
+                if text:
+                    thinking_parts.append(text)
+        thinking_content = "".join(thinking_parts)
 
         # Extract tool calls
         tool_calls = []
         if message.tool_calls:
             for tool_call in message.tool_calls:
                 # Parse arguments from JSON string
-                arguments = json.loads(tool_call.function.arguments)
+                arguments = json_loads(tool_call.function.arguments)
 
                 tool_calls.append(
                     ToolCall(
@@ -253,11 +463,12 @@ class OpenAIClient(LLMClientBase):
 
         # Extract token usage from response
         usage = None
-        if hasattr(response, "usage") and response.usage:
+        response_usage = getattr(response, "usage", None)
+        if response_usage:
             usage = TokenUsage(
-                prompt_tokens=response.usage.prompt_tokens or 0,
-                completion_tokens=response.usage.completion_tokens or 0,
-                total_tokens=response.usage.total_tokens or 0,
+                prompt_tokens=response_usage.prompt_tokens or 0,
+                completion_tokens=response_usage.completion_tokens or 0,
+                total_tokens=response_usage.total_tokens or 0,
             )
 
         return LLMResponse(
@@ -284,24 +495,158 @@ class OpenAIClient(LLMClientBase):
         Returns:
             LLMResponse containing the generated content
         """
-        request_params = self._prepare_request(messages, tools, enable_deep_think)
-
-        if self.retry_config.enabled:
-            retry_decorator = async_retry(config=self.retry_config, on_retry=self.retry_callback)
-            api_call = retry_decorator(self._make_api_request)
-            response = await api_call(
-                request_params["api_messages"],
-                request_params["tools"],
-                request_params["enable_deep_think"],
-            )
+        # Converted once here rather than on every retry attempt
+        _, api_messages = self._convert_messages(messages)
+        api_tools = self._convert_tools(tools) if tools else None
+
+        # Identical requests already in flight can share one API call. Deep thinking
+        # samples a fresh reasoning trace, so those requests are never merged.
+        deduplicate = self.deduplicate_requests and not enable_deep_think
+        # Hashing the history is only paid for when a cache or deduplication uses it
+        cache_key = None
+        if self.response_cache is not None or deduplicate:
+            cache_key = self._cache_key(messages, api_tools, enable_deep_think)
+
+        if self.response_cache is not None:
+            cached_json = await self.response_cache.get(cache_key)
+            if cached_json is not None:
+                logger.info("响应缓存命中 | model=%s | messages=%d", self.model, len(api_messages))
+                return LLMResponse.model_validate_json(cached_json)
+
+        # Similar answers can't stand in for tool calls or a fresh reasoning trace
+        use_semantic_cache = self.semantic_cache is not None and not tools and not enable_deep_think
+        if use_semantic_cache:
+            # Embedding is CPU-bound, keep it off the event loop
+            cached = await asyncio.to_thread(self.semantic_cache.lookup, messages)
+            if cached is not None:
+                logger.info("语义缓存命中 | model=%s | messages=%d", self.model, len(api_messages))
+                return cached
+
+        async def request() -> LLMResponse:
+            if self.retry_config.enabled:
+                retry_decorator = async_retry(config=self.retry_config, on_retry=self.retry_callback)
+                api_call = retry_decorator(self._make_api_request)
+                response = await api_call(api_messages, api_tools, enable_deep_think)
+            else:
+                response = await self._make_api_request(api_messages, api_tools, enable_deep_think)
+
+            result = self._parse_response(response, enable_deep_think=enable_deep_think)
+            if self.response_cache is not None:
+                await self.response_cache.set(cache_key, result.model_dump_json())
+            if use_semantic_cache:
+                await asyncio.to_thread(self.semantic_cache.store, messages, result)
+            return result
+
+        if deduplicate:
+            return await self._deduplicate(cache_key, request)
+        return await request()
+
+    async def _deduplicate(self, key: str, request: Callable[[], Awaitable[LLMResponse]]) -> LLMResponse:
+        """Run request, or wait for the identical one already in flight.
+
+        Args:
+            key: Request hash from _cache_key
+            request: Coroutine function performing the request
+
+        Returns:
+            LLMResponse shared by every caller with the same key
+        """
+        pending = self._inflight.get(key)
+        if pending is not None:
+            logger.info("合并进行中的相同请求 | model=%s", self.model)
+            try:
+                # Shielded so one waiter being cancelled doesn't cancel the shared request
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+            # The caller that issued the request was cancelled; issue it again
+            return await self._deduplicate(key, request)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await request()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved, so an error with no other waiters isn't logged as unhandled
+            future.exception()
+            raise
         else:
-            response = await self._make_api_request(
-                request_params["api_messages"],
-                request_params["tools"],
-                request_params["enable_deep_think"],
-            )
+            future.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
 
-        return self._parse_response(response, enable_deep_think=request_params["enable_deep_think"])
+    async def submit_batch(self, requests: list[tuple[str, list[Message], list[Any] | None]]) -> str:
+        """Submit independent requests through the Batch API.
+
+        Batches are processed asynchronously (results can take up to 24h) at
+        a lower token price, so this is only for offline bulk work such as
+        evaluations or replays, never for interactive sessions. The endpoint
+        must support the Files and Batch APIs; OpenAI-compatible gateways may not.
+
+        Args:
+            requests: List of (custom_id, messages, tools); custom_id must be
+                unique within the batch and is used to match results
+
+        Returns:
+            The batch ID, to pass to poll_batch
+        """
+        lines = []
+        for custom_id, messages, tools in requests:
+            _, api_messages = self._convert_messages(messages)
+            api_tools = self._convert_tools(tools) if tools else None
+            params = self._request_params(api_messages, api_tools, enable_deep_think=False)
+            # The SDK merges extra_body into direct requests; batch lines carry the final body
+            body = {**params.pop("extra_body"), **params}
+            lines.append(json_dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}))
+
+        input_file = await self.client.files.create(file=("batch.jsonl", "\n".join(lines).encode()), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        logger.info("批处理已提交 | id=%s | requests=%d", batch.id, len(lines))
+        return batch.id
+
+    async def poll_batch(self, batch_id: str) -> dict[str, LLMResponse] | None:
+        """Fetch the results of a batch submitted with submit_batch.
+
+        Args:
+            batch_id: ID returned by submit_batch
+
+        Returns:
+            None while the batch is still processing; once it has ended, a
+            dict of custom_id to LLMResponse for the requests that succeeded
+            (failed requests are logged and left out)
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status not in ("completed", "failed", "expired", "cancelled"):
+            return None
+
+        results: dict[str, LLMResponse] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line:
+                    continue
+                entry = json_loads(line)
+                response = entry.get("response") or {}
+                if response.get("status_code") == 200:
+                    completion = ChatCompletion.model_validate(response["body"])
+                    results[entry["custom_id"]] = self._parse_response(completion)
+                else:
+                    error = entry.get("error") or response.get("status_code")
+                    logger.warning("批处理请求未成功 | id=%s | custom_id=%s | result=%s", batch_id, entry["custom_id"], error)
+        return results
 
     async def stream_generate(
         self,
@@ -319,68 +664,77 @@ class OpenAIClient(LLMClientBase):
         Yields:
             Dict with type and content
         """
-        _, api_messages = self._convert_messages(messages)
-        logger.info(f"model={self.model} | messages={len(api_messages)} | deep_think={enable_deep_think}")
-        
-        params = {
-            "model": self.model,
-            "messages": api_messages,
-            "stream": True,
-        }
-
-        if enable_deep_think:
-            params["extra_body"] = {"reasoning_split": True}
-        else:
-            params["extra_body"] = {"reasoning_enabled": False}
+        # Bound once: the streaming loop logs thinking transitions per response
+        log_info = logger.info
+        info_enabled = logger.isEnabledFor(logging.INFO)
 
-        if tools:
-            params["tools"] = self._convert_tools(tools)
+        _, api_messages = self._convert_messages(messages)
+        if info_enabled:
+            log_info("model=%s | messages=%d | deep_think=%s", self.model, len(api_messages), enable_deep_think)
 
+        api_tools = self._convert_tools(tools) if tools else None
+        params = self._request_params(api_messages, api_tools, enable_deep_think, stream=True)
         response_stream = await self.client.chat.completions.create(**params)
 
         chunk_count = 0
-        content_length = 0
-        thinking_length = 0
-        tool_calls_data = {}
+        # Argument fragments are collected per call and joined once the stream ends
+        tool_calls_data: dict[int, dict[str, Any]] = {}
         thinking_started = False
         thinking_start_time = None
         thinking_duration_value = None
-        full_thinking = ""
-        full_content = ""
+        # Streamed text is collected as parts and joined once at the end
+        thinking_parts: list[str] = []
+        content_parts: list[str] = []
+        usage = None
+        finish_reason = "stop"
         
         async for chunk in response_stream:
-            if chunk.choices and len(chunk.choices) > 0:
-                delta = chunk.choices[0].delta
+            chunk_usage = getattr(chunk, "usage", None)
+            if chunk_usage:
+                usage = TokenUsage(
+                    prompt_tokens=chunk_usage.prompt_tokens or 0,
+                    completion_tokens=chunk_usage.completion_tokens or 0,
+                    total_tokens=chunk_usage.total_tokens or 0,
+                )
+
+            if chunk.choices:
+                choice = chunk.choices[0]
+                delta = choice.delta
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
                 
-                if enable_deep_think and hasattr(delta, "reasoning_content") and delta.reasoning_content:
+                thinking = getattr(delta, "reasoning_content", None) if enable_deep_think else None
+                if thinking:
                     if not thinking_started:
                         thinking_started = True
                         thinking_start_time = time.time()
-                        logger.info(f"思考开始")
+                        if info_enabled:
+                            log_info("思考开始")
                         yield {"type": "thinking_start", "content": ""}
-                    thinking_length += len(delta.reasoning_content)
-                    full_thinking += delta.reasoning_content
-                    yield {"type": "thinking", "content": delta.reasoning_content}
+                    thinking_parts.append(thinking)
+                    yield {"type": "thinking", "content": thinking}
                 
-                if delta.content:
+                content = delta.content
+                if content:
                     if thinking_started and thinking_start_time:
                         thinking_duration_value = round(time.time() - thinking_start_time, 1)
-                        logger.info(f"思考结束 | 用时: {thinking_duration_value}s")
+                        if info_enabled:
+                            log_info("思考结束 | 用时: %ss", thinking_duration_value)
                         yield {"type": "thinking_end", "duration": thinking_duration_value}
                         thinking_started = False
                     chunk_count += 1
-                    content_length += len(delta.content)
-                    full_content += delta.content
-                    yield {"type": "content", "content": delta.content}
+                    content_parts.append(content)
+                    yield {"type": "content", "content": content}
                 
-                if hasattr(delta, "tool_calls") and delta.tool_calls:
-                    for tool_call in delta.tool_calls:
+                delta_tool_calls = getattr(delta, "tool_calls", None)
+                if delta_tool_calls:
+                    for tool_call in delta_tool_calls:
                         idx = tool_call.index
                         if idx not in tool_calls_data:
                             tool_calls_data[idx] = {
                                 "id": tool_call.id or "",
                                 "name": "",
-                                "arguments": ""
+                                "arguments": []
                             }
                             if tool_call.id:
                                 yield {
@@ -398,13 +752,16 @@ class OpenAIClient(LLMClientBase):
                                     "tool_name": tool_call.function.name
                                 }
                             if tool_call.function.arguments:
-                                tool_calls_data[idx]["arguments"] += tool_call.function.arguments
+                                tool_calls_data[idx]["arguments"].append(tool_call.function.arguments)
                                 yield {
                                     "type": "tool_call_args",
                                     "tool_call_id": tool_calls_data[idx]["id"],
                                     "arguments": tool_call.function.arguments
                                 }
         
+        full_content = "".join(content_parts)
+        full_thinking = "".join(thinking_parts)
+
         final_tool_calls = []
         for idx in sorted(tool_calls_data.keys()):
             tc = tool_calls_data[idx]
@@ -414,23 +771,49 @@ class OpenAIClient(LLMClientBase):
                     "type": "function",
                     "function": {
                         "name": tc["name"],
-                        "arguments": tc["arguments"]
+                        "arguments": "".join(tc["arguments"])
                     }
                 })
         
         if thinking_started and thinking_start_time:
             thinking_duration_value = round(time.time() - thinking_start_time, 1)
-            logger.info(f"思考结束 | 用时: {thinking_duration_value}s")
+            if info_enabled:
+                log_info("思考结束 | 用时: %ss", thinking_duration_value)
             yield {"type": "thinking_end", "duration": thinking_duration_value}
         
-        logger.info(f"完成 | chunks={chunk_count} | content={content_length} | thinking={thinking_length} | thinking_duration={thinking_duration_value} | tool_calls={len(final_tool_calls)}")
-        
-        if full_thinking:
-            logger.info(f"思考内容:\n{full_thinking}")
-        if full_content:
-            logger.info(f"正式内容:\n{full_content}")
-        if final_tool_calls:
-            for tc in final_tool_calls:
-                logger.info(f"工具调用: {tc['function']['name']} | 参数: {tc['function']['arguments']}")
+        if info_enabled:
+            # One record per response instead of one per section
+            sections = [
+                f"完成 | chunks={chunk_count} | content={len(full_content)} | thinking={len(full_thinking)} | "
+                f"thinking_duration={thinking_duration_value} | tool_calls={len(final_tool_calls)}"
+            ]
+            if full_thinking:
+                sections.append(f"思考内容:\n{full_thinking}")
+            if full_content:
+                sections.append(f"正式内容:\n{full_content}")
+            sections.extend(f"工具调用: {tc['function']['name']} | 参数: {tc['function']['arguments']}" for tc in final_tool_calls)
+            log_info("%s", "\n".join(sections))
         
-        yield {"type": "done", "tool_calls": final_tool_calls}
+        response_tool_calls = []
+        for tc in final_tool_calls:
+            try:
+                arguments = json_loads(tc["function"]["arguments"]) if tc["function"]["arguments"] else {}
+            except json.JSONDecodeError:
+                arguments = {}
+            response_tool_calls.append(
+                ToolCall(
+                    id=tc["id"],
+                    type="function",
+                    function=FunctionCall(name=tc["function"]["name"], arguments=arguments),
+                )
+            )
+
+        response = LLMResponse(
+            content=full_content,
+            thinking=full_thinking or None,
+            tool_calls=response_tool_calls or None,
+            finish_reason=finish_reason,
+            usage=usage,
+        )
+
+        yield {"type": "done", "tool_calls": final_tool_calls, "usage": usage, "finish_reason": finish_reason, "response": response}
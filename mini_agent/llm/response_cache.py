@@ -0,0 +1,100 @@
+"""Exact-match response caches for LLM clients.
+
+Serialized responses are stored under a hash of the request in a
+CacheBackend: InMemoryLRU inside the process, or RedisBackend to share
+entries between processes (``pip install mini-agent[redis]``).
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+DEFAULT_RESPONSE_CACHE_TTL = 3600.0
+
+
+class CacheBackend(Protocol):
+    """Key-value store for serialized responses."""
+
+    async def get(self, key: str) -> str | None:
+        """Return the value stored under key, or None if absent or expired."""
+        ...
+
+    async def set(self, key: str, value: str) -> None:
+        """Store value under key."""
+        ...
+
+
+class InMemoryLRU:
+    """Process-local CacheBackend with LRU eviction and a time-to-live."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float | None = DEFAULT_RESPONSE_CACHE_TTL):
+        """Initialize in-memory cache.
+
+        Args:
+            max_entries: Maximum number of stored values
+            ttl: Seconds a value stays valid (None: until evicted)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (expiry time or None, value), least recently used first
+        self._entries: OrderedDict[str, tuple[float | None, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires is not None and expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisBackend:
+    """CacheBackend storing values in Redis, shared by every process using it."""
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        ttl: float | None = DEFAULT_RESPONSE_CACHE_TTL,
+        prefix: str = "mini-agent:llm:",
+        client: Any = None,
+    ):
+        """Initialize Redis cache.
+
+        Args:
+            url: Redis connection URL, used when no client is given
+            ttl: Seconds a value stays valid (None: no expiry)
+            prefix: Prefix added to every key
+            client: Optional existing redis.asyncio client
+        """
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:  # Optional dependency
+                raise ImportError("RedisBackend needs redis (pip install mini-agent[redis])") from e
+            client = redis.from_url(url)
+        self._client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> str | None:
+        value = await self._client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        expiry = max(1, int(self.ttl)) if self.ttl is not None else None
+        await self._client.set(self.prefix + key, value, ex=expiry)
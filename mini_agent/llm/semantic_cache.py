@@ -0,0 +1,223 @@
+"""Semantic response cache for LLM clients.
+
+SemanticCache reuses a stored response when a new prompt embeds close to one
+answered before, so near-identical requests skip the API call. Embeddings come
+from any text -> vector callable; by default a local sentence-transformers
+model is loaded (``pip install mini-agent[semantic-cache]``).
+"""
+
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+from ..schema import LLMResponse, Message
+from ..utils import json_dumps_canonical
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_SEMANTIC_CACHE_PATH = Path.home() / ".mini-agent" / "sem_cache.npz"
+
+
+def _sentence_transformer_embedder(model_name: str) -> tuple[Callable[[str], Sequence[float]], Callable[[str], bool]]:
+    """Load a local sentence-transformers model; return its encode function and window check."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:  # Optional dependency
+        raise ImportError(
+            "SemanticCache needs an embed function or sentence-transformers "
+            "(pip install mini-agent[semantic-cache])"
+        ) from e
+    model = SentenceTransformer(model_name)
+
+    def fits_window(text: str) -> bool:
+        # The model truncates longer input; +2 for the special tokens it adds
+        return len(model.tokenizer.tokenize(text)) + 2 <= model.max_seq_length
+
+    return model.encode, fits_window
+
+
+def _text_content(content: str | list[dict[str, Any]]) -> str | None:
+    """Text of a message's content, or None if it has non-text blocks."""
+    if isinstance(content, str):
+        return content
+    if any(block.get("type") != "text" for block in content):
+        return None
+    return "\n".join(block.get("text", "") for block in content)
+
+
+class SemanticCache:
+    """In-memory cache of responses keyed by prompt embeddings.
+
+    Only the final user message is compared by embedding. Everything before
+    it (system prompt, earlier turns, assistant and tool messages) must match
+    exactly, via a hash, so a response is only reused within the same
+    context. Among entries with that context, the one whose final message has
+    the highest cosine similarity is returned if it reaches the threshold.
+    Conversations not ending in a user message, or whose final message is
+    longer than the embedding model can see whole, bypass the cache. The
+    least recently used entry is evicted once max_entries is reached. Safe to
+    call from worker threads.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], Sequence[float]] | None = None,
+        threshold: float = 0.92,
+        max_entries: int = 512,
+        path: str | Path | None = None,
+        fits_window: Callable[[str], bool] | None = None,
+    ):
+        """Initialize semantic cache.
+
+        Args:
+            embed: Function mapping prompt text to an embedding vector
+                   (default: local all-MiniLM-L6-v2 via sentence-transformers)
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum number of cached responses
+            path: Optional .npz file to load entries from and save them to
+                  (e.g. DEFAULT_SEMANTIC_CACHE_PATH)
+            fits_window: Whether a text fits the embedding model's input window
+                         (default: the default model's tokenizer limit; no
+                         limit when embed is given)
+        """
+        if embed is None:
+            embed, default_fits = _sentence_transformer_embedder(DEFAULT_EMBEDDING_MODEL)
+            fits_window = fits_window or default_fits
+        self._embed = embed
+        self._fits_window = fits_window
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+
+        self._lock = threading.Lock()
+        # Unit-length embeddings, one row per entry, parallel to _responses
+        self._vectors: np.ndarray | None = None
+        self._responses: list[LLMResponse] = []
+        # Hash of everything before the final user message, per entry
+        self._contexts: list[str] = []
+        self._last_used: list[int] = []
+        self._clock = 0
+        # Embedding of the last looked-up prompt, reused when a miss is stored
+        self._last_query: tuple[str, np.ndarray] | None = None
+
+        if self.path and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def prompt_key(self, messages: list[Message]) -> tuple[str, str] | None:
+        """What the cache matches on: (hash of the context, final user text).
+
+        Returns:
+            The pair, or None if the conversation can't be cached
+        """
+        if not messages or messages[-1].role != "user":
+            return None
+        text = _text_content(messages[-1].content)
+        if text is None or (self._fits_window is not None and not self._fits_window(text)):
+            return None
+        context = json_dumps_canonical([msg.model_dump(mode="json") for msg in messages[:-1]])
+        return hashlib.sha256(context.encode()).hexdigest(), text
+
+    def _query_vector(self, text: str) -> np.ndarray:
+        if self._last_query is not None and self._last_query[0] == text:
+            return self._last_query[1]
+        vector = np.asarray(self._embed(text), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        self._last_query = (text, vector)
+        return vector
+
+    def lookup(self, messages: list[Message]) -> LLMResponse | None:
+        """Return the cached response for a similar prompt, or None on a miss.
+
+        Args:
+            messages: Conversation about to be sent
+
+        Returns:
+            Cached LLMResponse, or None
+        """
+        prompt = self.prompt_key(messages)
+        if prompt is None:
+            return None
+        context, text = prompt
+        query = self._query_vector(text)
+        with self._lock:
+            rows = [i for i, entry_context in enumerate(self._contexts) if entry_context == context]
+            if not rows:
+                return None
+            sims = self._vectors[rows] @ query
+            best_row = int(np.argmax(sims))
+            if sims[best_row] < self.threshold:
+                return None
+            best = rows[best_row]
+            self._clock += 1
+            self._last_used[best] = self._clock
+            logger.debug("Semantic cache hit | similarity=%.3f", sims[best_row])
+            return self._responses[best]
+
+    def store(self, messages: list[Message], response: LLMResponse):
+        """Cache a response for the prompt in messages, saving to path if set.
+
+        Args:
+            messages: Conversation that was sent
+            response: Response the model returned for it
+        """
+        prompt = self.prompt_key(messages)
+        if prompt is None:
+            return
+        context, text = prompt
+        vector = self._query_vector(text)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.empty((0, vector.shape[0]), dtype=np.float32)
+            if len(self._responses) >= self.max_entries:
+                oldest = int(np.argmin(self._last_used))
+                self._vectors = np.delete(self._vectors, oldest, axis=0)
+                del self._responses[oldest]
+                del self._contexts[oldest]
+                del self._last_used[oldest]
+            self._clock += 1
+            self._vectors = np.vstack([self._vectors, vector[np.newaxis, :]])
+            self._responses.append(response)
+            self._contexts.append(context)
+            self._last_used.append(self._clock)
+            if self.path:
+                self._save()
+
+    def _save(self):
+        """Write all entries to path. Called with the lock held."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("wb") as f:
+            np.savez(
+                f,
+                vectors=self._vectors,
+                responses=np.array([r.model_dump_json() for r in self._responses], dtype=str),
+                contexts=np.array(self._contexts, dtype=str),
+                last_used=np.array(self._last_used, dtype=np.int64),
+            )
+
+    def _load(self):
+        """Read entries saved by a previous process, ignoring an unreadable file."""
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                vectors: Any = data["vectors"].astype(np.float32)
+                responses = [LLMResponse.model_validate_json(str(r)) for r in data["responses"]]
+                contexts = [str(c) for c in data["contexts"]]
+                last_used = [int(t) for t in data["last_used"]]
+        except Exception as e:
+            logger.warning("Failed to load semantic cache from %s: %s", self.path, e)
+            return
+        keep = len(responses) - min(len(responses), self.max_entries)
+        self._vectors = vectors[keep:]
+        self._responses = responses[keep:]
+        self._contexts = contexts[keep:]
+        self._last_used = last_used[keep:]
+        self._clock = max(self._last_used, default=0)
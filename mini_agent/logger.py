@@ -1,6 +1,7 @@
 """Agent run logger"""
 
 import json
+import textwrap
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -49,36 +50,18 @@ class AgentLogger:
         """
         self.log_index += 1
 
-        # Build complete request data structure
-        request_data = {
-            "messages": [],
-            "tools": [],
-        }
-
-        # Convert messages to JSON serializable format
-        for msg in messages:
-            msg_dict = {
-                "role": msg.role,
-                "content": msg.content,
-            }
-            if msg.thinking:
-                msg_dict["thinking"] = msg.thinking
-            if msg.tool_calls:
-                msg_dict["tool_calls"] = [tc.model_dump() for tc in msg.tool_calls]
-            if msg.tool_call_id:
-                msg_dict["tool_call_id"] = msg.tool_call_id
-            if msg.name:
-                msg_dict["name"] = msg.name
-
-            request_data["messages"].append(msg_dict)
+        # Each message's JSON is built once and cached on the (frozen) message,
+        # so re-logging a long history only serializes the messages added since
+        messages_json = ",\n".join(msg.converted("run_log", _message_log_json) for msg in messages)
+        messages_json = f"[\n{messages_json}\n  ]" if messages_json else "[]"
 
         # Only record tool names
-        if tools:
-            request_data["tools"] = [tool.name for tool in tools]
+        tool_names = [tool.name for tool in tools] if tools else []
+        tools_json = json.dumps(tool_names, indent=2, ensure_ascii=False).replace("\n", "\n  ")
 
-        # Format as JSON
+        # Same text as json.dumps({"messages": [...], "tools": [...]}, indent=2)
         content = "LLM Request:\n\n"
-        content += json.dumps(request_data, indent=2, ensure_ascii=False)
+        content += f'{{\n  "messages": {messages_json},\n  "tools": {tools_json}\n}}'
 
         self._write_log("REQUEST", content)
 
@@ -176,3 +159,20 @@ class AgentLogger:
     def get_log_file_path(self) -> Path:
         """Get current log file path"""
         return self.log_file
+
+
+def _message_log_json(msg: Message) -> str:
+    """A message as indented JSON, positioned as an item of the request's messages list."""
+    msg_dict = {
+        "role": msg.role,
+        "content": msg.content,
+    }
+    if msg.thinking:
+        msg_dict["thinking"] = msg.thinking
+    if msg.tool_calls:
+        msg_dict["tool_calls"] = [tc.model_dump() for tc in msg.tool_calls]
+    if msg.tool_call_id:
+        msg_dict["tool_call_id"] = msg.tool_call_id
+    if msg.name:
+        msg_dict["name"] = msg.name
+    return textwrap.indent(json.dumps(msg_dict, indent=2, ensure_ascii=False), "    ")
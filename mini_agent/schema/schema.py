@@ -1,7 +1,7 @@
 from enum import Enum
-from typing import Any
+from typing import Any, Callable
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr, TypeAdapter
 
 
 class LLMProvider(str, Enum):
@@ -14,6 +14,8 @@ class LLMProvider(str, Enum):
 class FunctionCall(BaseModel):
     """Function call details."""
 
+    model_config = ConfigDict(frozen=True)
+
     name: str
     arguments: dict[str, Any]  # Function arguments as dict
 
@@ -21,14 +23,22 @@ class FunctionCall(BaseModel):
 class ToolCall(BaseModel):
     """Tool call structure."""
 
+    model_config = ConfigDict(frozen=True)
+
     id: str
     type: str  # "function"
     function: FunctionCall
 
 
+# Serializes tool call lists straight to JSON bytes in pydantic-core
+_TOOL_CALLS_ADAPTER = TypeAdapter(list[ToolCall])
+
+
 class Message(BaseModel):
     """Chat message."""
 
+    model_config = ConfigDict(frozen=True)
+
     role: str  # "system", "user", "assistant", "tool"
     content: str | list[dict[str, Any]]  # Can be string or list of content blocks
     thinking: str | None = None  # Extended thinking content for assistant messages
@@ -36,10 +46,34 @@ class Message(BaseModel):
     tool_call_id: str | None = None
     name: str | None = None  # For tool role
 
+    _tool_calls_json: str | None = PrivateAttr(default=None)
+    _converted: dict[str, Any] | None = PrivateAttr(default=None)
+
+    def tool_calls_json(self) -> str:
+        """Compact JSON form of tool_calls, serialized once and cached."""
+        if self._tool_calls_json is None:
+            self._tool_calls_json = _TOOL_CALLS_ADAPTER.dump_json(self.tool_calls or []).decode()
+        return self._tool_calls_json
+
+    def converted(self, api_format: str, convert: Callable[["Message"], Any]) -> Any:
+        """Provider-format form of this message, built once per format and cached.
+
+        Messages are frozen, so LLM clients convert each one once instead of on
+        every request without the cached form going stale.
+        """
+        if self._converted is None:
+            self._converted = {}
+        elif api_format in self._converted:
+            return self._converted[api_format]
+        result = self._converted[api_format] = convert(self)
+        return result
+
 
 class TokenUsage(BaseModel):
     """Token usage statistics from LLM API response."""
 
+    model_config = ConfigDict(frozen=True)
+
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
@@ -48,6 +82,8 @@ class TokenUsage(BaseModel):
 class LLMResponse(BaseModel):
     """LLM response."""
 
+    model_config = ConfigDict(frozen=True)
+
     content: str
     thinking: str | None = None  # Extended thinking blocks
     tool_calls: list[ToolCall] | None = None
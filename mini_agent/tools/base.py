@@ -16,6 +16,15 @@ class ToolResult(BaseModel):
 class Tool:
     """Base class for all tools."""
 
+    # Tools with side effects that later calls in the same step may depend on
+    # set this so the agent runs them in order instead of concurrently.
+    serial: bool = False
+
+    # Schemas are built on first use and reused: a tool's name, description and
+    # parameters don't change once it is constructed.
+    _cached_schema: dict[str, Any] | None = None
+    _cached_openai_schema: dict[str, Any] | None = None
+
     @property
     def name(self) -> str:
         """Tool name."""
@@ -37,19 +46,23 @@ class Tool:
 
     def to_schema(self) -> dict[str, Any]:
         """Convert tool to Anthropic tool schema."""
-        return {
-            "name": self.name,
-            "description": self.description,
-            "input_schema": self.parameters,
-        }
+        if self._cached_schema is None:
+            self._cached_schema = {
+                "name": self.name,
+                "description": self.description,
+                "input_schema": self.parameters,
+            }
+        return self._cached_schema
 
     def to_openai_schema(self) -> dict[str, Any]:
         """Convert tool to OpenAI tool schema."""
-        return {
-            "type": "function",
-            "function": {
-                "name": self.name,
-                "description": self.description,
-                "parameters": self.parameters,
-            },
-        }
+        if self._cached_openai_schema is None:
+            self._cached_openai_schema = {
+                "type": "function",
+                "function": {
+                    "name": self.name,
+                    "description": self.description,
+                    "parameters": self.parameters,
+                },
+            }
+        return self._cached_openai_schema
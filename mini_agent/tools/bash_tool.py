@@ -222,6 +222,8 @@ class BashTool(Tool):
     - Unix/Linux/macOS: bash
     """
 
+    serial = True
+
     def __init__(self, workspace_dir: str | None = None):
         """Initialize BashTool with OS-specific shell detection.
 
@@ -535,6 +537,8 @@ class BashOutputTool(Tool):
 class BashKillTool(Tool):
     """Terminate a running background bash shell."""
 
+    serial = True
+
     @property
     def name(self) -> str:
         return "bash_kill"
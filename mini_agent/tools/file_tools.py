@@ -155,6 +155,8 @@ class ReadTool(Tool):
 class WriteTool(Tool):
     """Write content to a file."""
 
+    serial = True
+
     def __init__(self, workspace_dir: str = "."):
         """Initialize WriteTool with workspace directory.
 
@@ -212,6 +214,8 @@ class WriteTool(Tool):
 class EditTool(Tool):
     """Edit file by replacing text."""
 
+    serial = True
+
     def __init__(self, workspace_dir: str = "."):
         """Initialize EditTool with workspace directory.
 
@@ -28,6 +28,8 @@ class SessionNoteTool(Tool):
     - recall_notes() -> retrieves all recorded notes
     """
 
+    serial = True
+
     def __init__(self, memory_file: str = "./workspace/.agent_memory.json"):
         """Initialize session note tool.
 
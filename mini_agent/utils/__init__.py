@@ -1,5 +1,6 @@
 """Utility modules for Mini-Agent."""
 
+from .json_utils import json_dumps, json_dumps_canonical, json_dumps_pretty, json_loads
 from .terminal_utils import (
     calculate_display_width,
     pad_to_width,
@@ -8,6 +9,10 @@ from .terminal_utils import (
 
 __all__ = [
     "calculate_display_width",
+    "json_dumps",
+    "json_dumps_canonical",
+    "json_dumps_pretty",
+    "json_loads",
     "pad_to_width",
     "truncate_with_ellipsis",
 ]
@@ -0,0 +1,82 @@
+"""JSON serialization helpers.
+
+Uses orjson when it is installed (``pip install mini-agent[fast]``) and falls
+back to the standard library otherwise. The output is the same either way
+except for some float spellings (orjson writes 1e16 and 0.00001 where json
+writes 1e+16 and 1e-05); json_dumps_canonical is stable across installs.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+
+def json_dumps_pretty(obj: Any) -> str:
+    """Serialize obj as 2-space indented JSON, keeping non-ASCII characters as-is.
+
+    Args:
+        obj: JSON-serializable object
+
+    Returns:
+        Indented JSON string
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            # Types orjson rejects (e.g. integers beyond 64 bits) go through json
+            pass
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize obj as compact JSON, keeping non-ASCII characters as-is.
+
+    Args:
+        obj: JSON-serializable object
+
+    Returns:
+        JSON string without insignificant whitespace
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def json_dumps_canonical(obj: Any) -> str:
+    """Serialize obj as compact JSON with sorted keys, for hashing.
+
+    Always uses the standard library, so the text (and any hash of it) is the
+    same whether or not orjson is installed.
+
+    Args:
+        obj: Object to serialize; values json can't encode are written as str(value)
+
+    Returns:
+        JSON string that only depends on the content of obj
+    """
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def json_loads(data: str | bytes) -> Any:
+    """Parse a JSON document.
+
+    Args:
+        data: JSON text as str or UTF-8 bytes
+
+    Returns:
+        Parsed object
+
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON (orjson's error subclasses it)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -162,6 +162,10 @@ async def lifespan(app: FastAPI):
     
     yield
     
+    from mini_agent.llm import AnthropicClient, OpenAIClient
+    await AnthropicClient.shutdown_all()
+    await OpenAIClient.shutdown_all()
+    
     if db_instance:
         db_instance.close()
     logger.info("服务器关闭")
@@ -630,9 +630,7 @@ async def chat_stream_generator(
                 pass
         
         error_msg = str(e)
-        logger.error(f"[{sid}] 流式响应异常: {error_msg}")
-        import traceback
-        logger.error(f"[{sid}] 异常堆栈:\n{traceback.format_exc()}")
+        logger.exception("[%s] 流式响应异常: %s", sid, error_msg)
         yield f"data: {json.dumps({'type': 'error', 'content': error_msg}, ensure_ascii=False)}\n\n"
 
 
@@ -678,22 +676,38 @@ async def chat_non_stream(
     
     agent = get_or_create_agent_for_session(session_id)
     
-    tool_list = list(agent.tools.values())
-    
-    full_response = ""
-    thinking_content = None
+    # run_stream 已按类型拆分思考与正文事件，这里只需按类型收集
+    content_parts: list[str] = []
+    thinking_parts: list[str] = []
+    tool_calls: list[dict] = []
+    error_msg = None
     
     try:
-        async for chunk in agent.run_stream(request.message, enable_deep_think=request.enable_deep_think):
-            if "[THINKING]" in chunk and "[/THINKING]" in chunk:
-                thinking_text = chunk.replace("[THINKING]", "").replace("[/THINKING]", "")
-                thinking_content = (thinking_content or "") + thinking_text
-            else:
-                full_response += chunk
+        async for event in agent.run_stream(request.message, enable_deep_think=request.enable_deep_think):
+            event_type = event.get("type")
+            if event_type == "content":
+                content_parts.append(event.get("content", ""))
+            elif event_type == "thinking":
+                thinking_parts.append(event.get("content", ""))
+            elif event_type == "tool_call":
+                tool_calls.append({
+                    "tool_name": event.get("tool_name", ""),
+                    "arguments": event.get("arguments", {}),
+                    "tool_call_id": event.get("tool_call_id", ""),
+                })
+            elif event_type == "error":
+                error_msg = event.get("content", "")
     except Exception as e:
         logger.error(f"[{sid}] 异常: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     
+    if error_msg is not None:
+        logger.error(f"[{sid}] 错误: {error_msg}")
+        raise HTTPException(status_code=500, detail=error_msg)
+    
+    full_response = "".join(content_parts)
+    thinking_content = "".join(thinking_parts) or None
+    
     assistant_message = {
         "role": "assistant",
         "content": full_response,
@@ -708,6 +722,6 @@ async def chat_non_stream(
         session_id=session_id,
         response=full_response,
         thinking=thinking_content,
-        tool_calls=None,
+        tool_calls=tool_calls or None,
         usage={"total_tokens": agent.api_total_tokens} if agent.api_total_tokens else None,
     )
@@ -10,6 +10,12 @@ from mini_agent.schema import FunctionCall, LLMResponse, ToolCall
 from mini_agent.tools.base import Tool, ToolResult
 
 
+@pytest.fixture(autouse=True)
+def run_logs_in_tmp(tmp_path, monkeypatch):
+    """AgentLogger writes run logs under the working directory; keep them out of the repo"""
+    monkeypatch.chdir(tmp_path)
+
+
 class DummyConn:
     def __init__(self):
         self.updates = []
@@ -13,7 +13,7 @@ from mini_agent.tools import BashTool, EditTool, ReadTool, WriteTool
 
 
 @pytest.mark.asyncio
-async def test_agent_simple_task():
+async def test_agent_simple_task(monkeypatch):
     """Test agent with a simple file creation task."""
     print("\n=== Testing Agent with Simple File Task ===")
 
@@ -47,6 +47,9 @@ async def test_agent_simple_task():
             BashTool(),
         ]
 
+        # Run logs go under the working directory
+        monkeypatch.chdir(workspace_dir)
+
         # Create agent
         agent = Agent(
             llm_client=llm_client,
@@ -95,7 +98,7 @@ async def test_agent_simple_task():
 
 
 @pytest.mark.asyncio
-async def test_agent_bash_task():
+async def test_agent_bash_task(monkeypatch):
     """Test agent with a bash command task."""
     print("\n=== Testing Agent with Bash Task ===")
 
@@ -128,6 +131,9 @@ async def test_agent_bash_task():
             BashTool(),
         ]
 
+        # Run logs go under the working directory
+        monkeypatch.chdir(workspace_dir)
+
         # Create agent
         agent = Agent(
             llm_client=llm_client,
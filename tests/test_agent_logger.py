@@ -0,0 +1,85 @@
+"""
+Agent logger tests - Testing what each run log request entry records
+"""
+
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from mini_agent import LLMClient
+from mini_agent.agent import Agent
+from mini_agent.logger import AgentLogger
+from mini_agent.schema import FunctionCall, LLMResponse, Message, ToolCall
+
+
+@pytest.fixture
+def run_logger(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    agent_logger = AgentLogger()
+    agent_logger.start_new_run()
+    return agent_logger
+
+
+def _logged_requests(agent_logger: AgentLogger) -> list[dict]:
+    text = agent_logger.get_log_file_path().read_text(encoding="utf-8")
+    return [json.loads(part.split("\n-")[0]) for part in text.split("LLM Request:\n\n")[1:]]
+
+
+def test_requests_log_full_history(run_logger):
+    """Test every request entry holds the whole history, in the plain json.dumps layout"""
+    tool_call = ToolCall(id="call_1", type="function", function=FunctionCall(name="bash", arguments={"cmd": "ls"}))
+    history = [Message(role="system", content="sys")]
+    run_logger.log_request(history)
+    history += [
+        Message(role="user", content=[{"type": "text", "text": "多行\n输入"}]),
+        Message(role="assistant", content="", thinking="hmm", tool_calls=[tool_call]),
+        Message(role="tool", content="ok", tool_call_id="call_1", name="bash"),
+    ]
+    run_logger.log_request(history, tools=[SimpleNamespace(name="bash")])
+
+    text = run_logger.log_file.read_text(encoding="utf-8")
+    first, second = (part.split("\n-")[0].rstrip("\n") for part in text.split("LLM Request:\n\n")[1:])
+    assert first == json.dumps({"messages": [{"role": "system", "content": "sys"}], "tools": []}, indent=2)
+    expected = json.loads(second)
+    assert [m["role"] for m in expected["messages"]] == ["system", "user", "assistant", "tool"]
+    assert expected["messages"][2]["tool_calls"][0]["function"]["arguments"] == {"cmd": "ls"}
+    assert second == json.dumps(expected, indent=2, ensure_ascii=False)
+
+
+def test_new_run_logs_full_history(run_logger):
+    """Test each run's log file starts with the whole history"""
+    history = [Message(role="system", content="sys"), Message(role="user", content="first")]
+    run_logger.log_request(history)
+    run_logger.start_new_run()
+    run_logger.log_request(history)
+
+    (entry,) = _logged_requests(run_logger)
+    assert len(entry["messages"]) == 2
+
+
+async def test_request_log_written_while_llm_call_runs(tmp_path, monkeypatch):
+    """Test the request entry is written off the event loop and still precedes the response"""
+    monkeypatch.chdir(tmp_path)
+    events = []
+    agent = Agent(llm_client=MagicMock(spec=LLMClient), system_prompt="sys", tools=[], workspace_dir=str(tmp_path))
+    log_request = agent.logger.log_request
+
+    def slow_log_request(messages, tools=None):
+        time.sleep(0.1)
+        log_request(messages, tools)
+        events.append("request logged")
+
+    async def generate(**kwargs):
+        events.append("llm called")
+        return LLMResponse(content="done", finish_reason="stop")
+
+    monkeypatch.setattr(agent.logger, "log_request", slow_log_request)
+    agent.llm.generate = generate
+    assert await agent.run("go") == "done"
+
+    assert events == ["llm called", "request logged"]
+    text = agent.logger.get_log_file_path().read_text(encoding="utf-8")
+    assert text.index("] REQUEST") < text.index("] RESPONSE")
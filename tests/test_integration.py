@@ -16,7 +16,7 @@ from mini_agent.tools.note_tool import RecallNoteTool, SessionNoteTool
 
 
 @pytest.mark.asyncio
-async def test_basic_agent_usage():
+async def test_basic_agent_usage(monkeypatch):
     """Test basic agent usage with file creation task.
 
     This is the integration test for basic agent functionality,
@@ -85,6 +85,9 @@ async def test_basic_agent_usage():
         except Exception as e:
             print(f"⚠️  MCP tools not loaded: {e}")
 
+        # Run logs go under the working directory
+        monkeypatch.chdir(workspace_dir)
+
         # Create agent
         agent = Agent(
             llm_client=llm_client,
@@ -120,7 +123,7 @@ async def test_basic_agent_usage():
 
 
 @pytest.mark.asyncio
-async def test_session_memory_demo():
+async def test_session_memory_demo(monkeypatch):
     """Test session memory functionality across multiple agent instances.
 
     This is the integration test for session note tool,
@@ -168,6 +171,8 @@ You have record_note and recall_notes tools:
         ]
 
         print("\n📝 Creating Agent with Session Note tools...")
+        # Run logs go under the working directory
+        monkeypatch.chdir(workspace_dir)
         agent = Agent(
             llm_client=llm_client,
             system_prompt=system_prompt,
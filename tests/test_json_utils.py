@@ -0,0 +1,54 @@
+"""Tests for json_utils module."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from mini_agent.utils import json_dumps, json_dumps_canonical, json_dumps_pretty, json_loads
+from mini_agent.utils import json_utils
+
+
+def test_matches_stdlib_indented_output():
+    """Test output is identical to json.dumps(indent=2, ensure_ascii=False)."""
+    obj = {"path": "笔记.md", "count": 3, "nested": {"items": [1, "two", None, True]}}
+    assert json_dumps_pretty(obj) == json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+def test_falls_back_without_orjson(monkeypatch):
+    """Test the stdlib path is used when orjson is not installed."""
+    monkeypatch.setattr(json_utils, "orjson", None)
+    assert json_dumps_pretty({"a": "é"}) == '{\n  "a": "é"\n}'
+
+
+def test_large_integers_fall_back_to_stdlib():
+    """Test values orjson cannot encode still serialize."""
+    assert json_dumps_pretty({"n": 2**70}) == json.dumps({"n": 2**70}, indent=2)
+
+
+def test_compact_dumps_same_with_and_without_orjson(monkeypatch):
+    """Test compact output does not depend on whether orjson is installed."""
+    obj = {"path": "笔记.md", "lines": [1, 2.5, None, False]}
+    fast = json_dumps(obj)
+    monkeypatch.setattr(json_utils, "orjson", None)
+    assert json_dumps(obj) == fast == json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def test_sorted_dumps_same_with_and_without_orjson(monkeypatch):
+    """Test canonical output, floats included, does not depend on whether orjson is installed."""
+    obj = {"b": {"z": 1, "a": [{"y": None, "x": "é"}]}, "a": 2, "f": [0.00001, 1e16, 2.5]}
+    fast = json_dumps_canonical(obj)
+    monkeypatch.setattr(json_utils, "orjson", None)
+    assert json_dumps_canonical(obj) == fast == '{"a":2,"b":{"a":[{"x":"é","y":null}],"z":1},"f":[1e-05,1e+16,2.5]}'
+
+
+def test_canonical_dumps_writes_unknown_types_as_str():
+    """Test values json can't encode are written as their str()."""
+    assert json_dumps_canonical({"path": Path("a.txt")}) == '{"path":"a.txt"}'
+
+
+def test_loads_accepts_bytes_and_raises_stdlib_error():
+    """Test parsing bytes input and that invalid JSON raises json.JSONDecodeError."""
+    assert json_loads(b'{"command": "ls"}') == {"command": "ls"}
+    with pytest.raises(json.JSONDecodeError):
+        json_loads('{"command": ')
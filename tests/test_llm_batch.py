@@ -0,0 +1,131 @@
+"""
+LLM batch tests - Testing batched generation and the provider batch APIs over independent requests
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from mini_agent.llm import AnthropicClient, OpenAIClient
+from mini_agent.retry import RetryConfig
+from mini_agent.schema import LLMResponse, Message
+
+
+async def test_batch_generate_keeps_order_and_bounds_concurrency():
+    """Test batch results follow input order with at most max_concurrency requests in flight"""
+    client = AnthropicClient(api_key="test-key", api_base="http://localhost:1", retry_config=RetryConfig(enabled=False))
+    in_flight = 0
+    peak = 0
+
+    async def fake_generate(messages, tools=None, enable_deep_think=False):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        prompt = messages[-1].content
+        # Later prompts finish first
+        await asyncio.sleep(0.01 * (5 - int(prompt)))
+        in_flight -= 1
+        return LLMResponse(content=f"answer {prompt}", finish_reason="stop")
+
+    client.generate = fake_generate
+    batch = [([Message(role="user", content=str(i))], None) for i in range(5)]
+
+    responses = await client.batch_generate(batch, max_concurrency=2)
+
+    assert [r.content for r in responses] == [f"answer {i}" for i in range(5)]
+    assert peak == 2
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def test_anthropic_message_batch_round_trip():
+    """Test submit_batch sends full request params and poll_batch parses finished results"""
+    client = AnthropicClient(api_key="test-key", api_base="http://localhost:1", retry_config=RetryConfig(enabled=False))
+    client.client = MagicMock()
+    batches = client.client.messages.batches
+    batches.create = AsyncMock(return_value=SimpleNamespace(id="batch_1"))
+
+    batch_id = await client.submit_batch(
+        [
+            ("a", [Message(role="system", content="be brief"), Message(role="user", content="one")], None),
+            ("b", [Message(role="user", content="two")], None),
+        ]
+    )
+
+    assert batch_id == "batch_1"
+    sent = batches.create.call_args.kwargs["requests"]
+    assert [r["custom_id"] for r in sent] == ["a", "b"]
+    assert sent[0]["params"]["system"] == "be brief"
+    assert sent[1]["params"]["messages"] == [{"role": "user", "content": "two"}]
+
+    batches.retrieve = AsyncMock(return_value=SimpleNamespace(processing_status="in_progress"))
+    assert await client.poll_batch(batch_id) is None
+
+    message = SimpleNamespace(content=[SimpleNamespace(type="text", text="1")], usage=None, stop_reason="end_turn")
+    batches.retrieve = AsyncMock(return_value=SimpleNamespace(processing_status="ended"))
+    batches.results = AsyncMock(
+        return_value=_aiter(
+            [
+                SimpleNamespace(custom_id="a", result=SimpleNamespace(type="succeeded", message=message)),
+                SimpleNamespace(custom_id="b", result=SimpleNamespace(type="errored")),
+            ]
+        )
+    )
+    results = await client.poll_batch(batch_id)
+
+    assert list(results) == ["a"]
+    assert results["a"].content == "1"
+
+
+async def test_openai_batch_round_trip():
+    """Test submit_batch uploads chat completion lines and poll_batch parses the output file"""
+    client = OpenAIClient(api_key="test-key", api_base="http://localhost:1", retry_config=RetryConfig(enabled=False))
+    client.client = MagicMock()
+    client.client.files.create = AsyncMock(return_value=SimpleNamespace(id="file_in"))
+    client.client.batches.create = AsyncMock(return_value=SimpleNamespace(id="batch_1"))
+
+    batch_id = await client.submit_batch(
+        [
+            ("a", [Message(role="system", content="be brief"), Message(role="user", content="one")], None),
+            ("b", [Message(role="user", content="two")], None),
+        ]
+    )
+
+    assert batch_id == "batch_1"
+    assert client.client.batches.create.call_args.kwargs["input_file_id"] == "file_in"
+    _, payload = client.client.files.create.call_args.kwargs["file"]
+    lines = [json.loads(line) for line in payload.decode().splitlines()]
+    assert [line["custom_id"] for line in lines] == ["a", "b"]
+    assert lines[0]["url"] == "/v1/chat/completions"
+    assert lines[0]["body"]["messages"][0] == {"role": "system", "content": "be brief"}
+    assert lines[1]["body"]["reasoning_enabled"] is False
+    assert "extra_body" not in lines[1]["body"]
+
+    client.client.batches.retrieve = AsyncMock(return_value=SimpleNamespace(status="in_progress"))
+    assert await client.poll_batch(batch_id) is None
+
+    completion = {
+        "id": "c1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "m",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "1"}, "finish_reason": "stop"}],
+    }
+    output = "\n".join(
+        [
+            json.dumps({"custom_id": "a", "response": {"status_code": 200, "body": completion}}),
+            json.dumps({"custom_id": "b", "response": {"status_code": 400, "body": {}}}),
+        ]
+    )
+    client.client.batches.retrieve = AsyncMock(
+        return_value=SimpleNamespace(status="completed", output_file_id="file_out", error_file_id=None)
+    )
+    client.client.files.content = AsyncMock(return_value=SimpleNamespace(text=output))
+    results = await client.poll_batch(batch_id)
+
+    assert list(results) == ["a"]
+    assert results["a"].content == "1"
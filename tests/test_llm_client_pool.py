@@ -0,0 +1,161 @@
+"""
+LLM client reuse tests - Testing that provider clients reuse SDK clients, connection pools and converted requests
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from mini_agent.llm import AnthropicClient, LLMClient, OpenAIClient
+from mini_agent.schema import FunctionCall, Message, ToolCall
+
+
+async def test_anthropic_clients_share_sdk_client():
+    """Test clients for the same endpoint and key reuse one SDK client within a loop"""
+    first = AnthropicClient(api_key="key-a", api_base="http://localhost:1")
+    second = AnthropicClient(api_key="key-a", api_base="http://localhost:1")
+    other_key = AnthropicClient(api_key="key-b", api_base="http://localhost:1")
+
+    assert first.client is second.client
+    assert other_key.client is not first.client
+
+    shared = first.client
+    await AnthropicClient.shutdown_all()
+    assert shared.is_closed()
+
+    # A fresh instance gets a new pool once the shared ones are closed
+    assert AnthropicClient(api_key="key-a", api_base="http://localhost:1").client is not shared
+    await AnthropicClient.shutdown_all()
+
+
+async def test_openai_clients_share_sdk_client():
+    """Test OpenAI clients for the same endpoint and key reuse one SDK client within a loop"""
+    first = OpenAIClient(api_key="key-a", api_base="http://localhost:1")
+    second = OpenAIClient(api_key="key-a", api_base="http://localhost:1")
+    other_base = OpenAIClient(api_key="key-a", api_base="http://localhost:2")
+
+    assert first.client is second.client
+    assert other_base.client is not first.client
+
+    shared = first.client
+    await OpenAIClient.shutdown_all()
+    assert shared.is_closed()
+    assert OpenAIClient(api_key="key-a", api_base="http://localhost:1").client is not shared
+    await OpenAIClient.shutdown_all()
+
+
+async def test_anthropic_pool_limits_are_part_of_the_key():
+    """Test clients with different pool limits don't share a pool"""
+    small = AnthropicClient(api_key="key-a", api_base="http://localhost:1", max_connections=4)
+    default = AnthropicClient(api_key="key-a", api_base="http://localhost:1")
+
+    assert small.client is not default.client
+    await AnthropicClient.shutdown_all()
+
+
+async def test_openai_pool_limits_are_applied():
+    """Test OpenAI clients get the configured pool size and don't share a pool across limits"""
+    small = OpenAIClient(api_key="key-a", api_base="http://localhost:1", max_connections=4)
+    default = OpenAIClient(api_key="key-a", api_base="http://localhost:1")
+
+    assert small.client is not default.client
+    assert small.client._client._transport._pool._max_connections == 4
+    await OpenAIClient.shutdown_all()
+
+
+async def test_openai_client_as_context_manager():
+    """Test the timeout is applied and leaving the async with block keeps the shared pool open"""
+    async with OpenAIClient(api_key="key-a", api_base="http://localhost:1", timeout=30.0) as client:
+        assert client.client.timeout == 30.0
+        shared = client.client
+    assert client._client is None
+    assert not shared.is_closed()
+
+    # Pools are only closed by shutdown_all, here via the wrapper
+    await LLMClient.shutdown_all()
+    assert shared.is_closed()
+
+
+def test_anthropic_tool_conversion_is_cached():
+    """Test the same tool objects are converted to schemas only once"""
+
+    class CountingTool:
+        calls = 0
+
+        def to_schema(self):
+            CountingTool.calls += 1
+            return {"name": "counting", "description": "", "input_schema": {"type": "object"}}
+
+    client = AnthropicClient(api_key="key-a", api_base="http://localhost:1")
+    tools = [CountingTool(), {"name": "plain", "description": "", "input_schema": {"type": "object"}}]
+
+    first = client._convert_tools(tools)
+    assert client._convert_tools(list(tools)) is first
+    assert CountingTool.calls == 1
+
+    # A different tool object means a different tool set
+    client._convert_tools([CountingTool()])
+    assert CountingTool.calls == 2
+
+
+def test_openai_tool_conversion_is_cached():
+    """Test Anthropic-format tool dicts are converted to OpenAI format once per tool set"""
+    client = OpenAIClient(api_key="key-a", api_base="http://localhost:1")
+    tools = [{"name": "bash", "description": "Run a command", "input_schema": {"type": "object"}}]
+
+    first = client._convert_tools(tools)
+    assert first[0]["function"]["name"] == "bash"
+    assert client._convert_tools(list(tools)) is first
+    assert client._convert_tools([dict(tools[0])]) is not first
+
+
+def test_anthropic_message_conversion_is_cached():
+    """Test each message is converted once and reused by later requests"""
+    client = AnthropicClient(api_key="key-a", api_base="http://localhost:1")
+    history = [
+        Message(role="system", content="be brief"),
+        Message(role="user", content="hi"),
+        Message(
+            role="assistant",
+            content="",
+            tool_calls=[ToolCall(id="t1", type="function", function=FunctionCall(name="bash", arguments={"command": "ls"}))],
+        ),
+        Message(role="tool", content="a.txt", tool_call_id="t1", name="bash"),
+    ]
+
+    system, first = client._convert_messages(history)
+    assert system == "be brief"
+    assert [m["role"] for m in first] == ["user", "assistant", "user"]
+    assert first[1]["content"][0] == {"type": "tool_use", "id": "t1", "name": "bash", "input": {"command": "ls"}}
+
+    history.append(Message(role="user", content="thanks"))
+    _, second = client._convert_messages(history)
+    assert all(a is b for a, b in zip(first, second))
+    assert second[-1] == {"role": "user", "content": "thanks"}
+
+
+def test_cached_message_cannot_be_modified():
+    """Test messages are frozen so their cached conversion can't go stale"""
+    msg = Message(role="user", content="hi")
+    AnthropicClient(api_key="key-a", api_base="http://localhost:1")._convert_messages([msg])
+    with pytest.raises(ValidationError):
+        msg.content = "changed"
+
+
+def test_openai_message_conversion_is_cached():
+    """Test OpenAI conversion reuses each message's converted form, system prompt included"""
+    client = OpenAIClient(api_key="key-a", api_base="http://localhost:1")
+    history = [
+        Message(role="system", content="be brief"),
+        Message(
+            role="assistant",
+            content="",
+            tool_calls=[ToolCall(id="t1", type="function", function=FunctionCall(name="bash", arguments={"command": "ls"}))],
+        ),
+    ]
+
+    _, first = client._convert_messages(history)
+    assert first[0] == {"role": "system", "content": "be brief"}
+    assert first[1]["tool_calls"][0]["function"] == {"name": "bash", "arguments": '{"command":"ls"}'}
+
+    _, second = client._convert_messages(history)
+    assert all(a is b for a, b in zip(first, second))
@@ -0,0 +1,225 @@
+"""
+LLM streaming tests - Testing stream assembly in the provider clients with fake SDK streams
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from mini_agent.llm import AnthropicClient, OpenAIClient
+from mini_agent.llm.base import coalesce_text_events
+from mini_agent.retry import RetryConfig
+from mini_agent.schema import Message
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+def _openai_chunk(content=None, tool_calls=None, finish_reason=None, usage=None, with_choice=True):
+    choices = []
+    if with_choice:
+        delta = SimpleNamespace(content=content, tool_calls=tool_calls, reasoning_content=None)
+        choices = [SimpleNamespace(delta=delta, finish_reason=finish_reason)]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def _openai_tool_delta(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+@pytest.fixture
+def openai_client():
+    client = OpenAIClient(api_key="test-key", api_base="http://localhost:1", retry_config=RetryConfig(enabled=False))
+    client.client = MagicMock()
+    return client
+
+
+@pytest.fixture
+def anthropic_client():
+    client = AnthropicClient(api_key="test-key", api_base="http://localhost:1", retry_config=RetryConfig(enabled=False))
+    client.client = MagicMock()
+    return client
+
+
+async def test_openai_stream_reports_usage_and_tool_calls(openai_client):
+    """Test the final done event carries tool calls, usage and finish reason"""
+    chunks = [
+        _openai_chunk(content="Hel"),
+        _openai_chunk(content="lo"),
+        _openai_chunk(tool_calls=[_openai_tool_delta(0, id="call_1", name="read_file", arguments='{"pa')]),
+        _openai_chunk(tool_calls=[_openai_tool_delta(0, arguments='th": "a.txt"}')], finish_reason="tool_calls"),
+        _openai_chunk(with_choice=False, usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15)),
+    ]
+    openai_client.client.chat.completions.create = AsyncMock(return_value=_aiter(chunks))
+
+    events = [e async for e in openai_client.stream_generate([Message(role="user", content="hi")])]
+
+    content = "".join(e["content"] for e in events if e["type"] == "content")
+    assert content == "Hello"
+    done = events[-1]
+    assert done["type"] == "done"
+    assert done["finish_reason"] == "tool_calls"
+    assert done["usage"].total_tokens == 15
+    assert done["tool_calls"][0]["function"]["name"] == "read_file"
+    assert done["tool_calls"][0]["function"]["arguments"] == '{"path": "a.txt"}'
+    assert done["response"].content == "Hello"
+    assert done["response"].tool_calls[0].function.arguments == {"path": "a.txt"}
+
+
+async def test_anthropic_stream_reports_usage_and_tool_calls(anthropic_client):
+    """Test Anthropic stream events are assembled into content, tool calls and usage"""
+    events_in = [
+        SimpleNamespace(type="message_start", message=SimpleNamespace(usage=SimpleNamespace(input_tokens=20, output_tokens=1))),
+        SimpleNamespace(type="content_block_start", index=0, content_block=SimpleNamespace(type="text", text="")),
+        SimpleNamespace(type="content_block_delta", index=0, delta=SimpleNamespace(type="text_delta", text="Done")),
+        SimpleNamespace(type="content_block_start", index=1, content_block=SimpleNamespace(type="tool_use", id="tu_1", name="bash")),
+        SimpleNamespace(type="content_block_delta", index=1, delta=SimpleNamespace(type="input_json_delta", partial_json='{"command": ')),
+        SimpleNamespace(type="content_block_delta", index=1, delta=SimpleNamespace(type="input_json_delta", partial_json='"ls"}')),
+        SimpleNamespace(type="message_delta", delta=SimpleNamespace(stop_reason="tool_use"), usage=SimpleNamespace(output_tokens=7)),
+    ]
+
+    stream_cm = MagicMock()
+    stream_cm.__aenter__ = AsyncMock(return_value=_aiter(events_in))
+    stream_cm.__aexit__ = AsyncMock(return_value=False)
+    anthropic_client.client.messages.stream = MagicMock(return_value=stream_cm)
+
+    events = [e async for e in anthropic_client.stream_generate([Message(role="user", content="hi")])]
+
+    content = "".join(e["content"] for e in events if e["type"] == "content")
+    assert content == "Done"
+    done = events[-1]
+    assert done["type"] == "done"
+    assert done["finish_reason"] == "tool_use"
+    assert done["usage"].prompt_tokens == 20
+    assert done["usage"].total_tokens == 27
+    assert done["tool_calls"] == [{"id": "tu_1", "name": "bash", "arguments": {"command": "ls"}}]
+    assert done["response"].content == "Done"
+    assert done["response"].tool_calls[0].function.name == "bash"
+    assert done["response"].usage.total_tokens == 27
+
+
+async def test_anthropic_stream_parses_tool_input_at_block_stop(anthropic_client, monkeypatch):
+    """Test tool input is parsed when its block stops and argument fragments are streamed"""
+    events_in = [
+        SimpleNamespace(type="content_block_start", index=0, content_block=SimpleNamespace(type="tool_use", id="tu_1", name="bash")),
+        SimpleNamespace(type="content_block_delta", index=0, delta=SimpleNamespace(type="input_json_delta", partial_json='{"command": ')),
+        SimpleNamespace(type="content_block_delta", index=0, delta=SimpleNamespace(type="input_json_delta", partial_json='"ls"}')),
+        SimpleNamespace(type="content_block_stop", index=0),
+        SimpleNamespace(type="content_block_start", index=1, content_block=SimpleNamespace(type="text", text="")),
+        SimpleNamespace(type="content_block_delta", index=1, delta=SimpleNamespace(type="text_delta", text="Running")),
+        SimpleNamespace(type="message_delta", delta=SimpleNamespace(stop_reason="tool_use"), usage=None),
+    ]
+
+    stream_cm = MagicMock()
+    stream_cm.__aenter__ = AsyncMock(return_value=_aiter(events_in))
+    stream_cm.__aexit__ = AsyncMock(return_value=False)
+    anthropic_client.client.messages.stream = MagicMock(return_value=stream_cm)
+
+    parse_calls = []
+    parse = AnthropicClient._parse_tool_arguments
+    monkeypatch.setattr(AnthropicClient, "_parse_tool_arguments", staticmethod(lambda parts: parse_calls.append(parts) or parse(parts)))
+
+    events = []
+    async for event in anthropic_client.stream_generate([Message(role="user", content="hi")]):
+        if event["type"] == "content":
+            # Parsed when its block stopped, before the next block streamed
+            assert len(parse_calls) == 1
+        events.append(event)
+
+    assert [e["arguments"] for e in events if e["type"] == "tool_call_args"] == ['{"command": ', '"ls"}']
+    assert events[-1]["tool_calls"] == [{"id": "tu_1", "name": "bash", "arguments": {"command": "ls"}}]
+    assert len(parse_calls) == 1
+
+
+async def test_anthropic_stream_retries_until_first_event():
+    """Test a stream that fails before any event is reopened, but not one that fails mid-way"""
+    client = AnthropicClient(
+        api_key="test-key",
+        api_base="http://localhost:1",
+        retry_config=RetryConfig(max_retries=2, initial_delay=0),
+    )
+    client.client = MagicMock()
+    text_event = SimpleNamespace(type="content_block_delta", index=0, delta=SimpleNamespace(type="text_delta", text="Hi"))
+
+    async def failing_iter(events):
+        for event in events:
+            yield event
+        raise ConnectionError("connection reset")
+
+    def stream_cm(events, fail):
+        cm = MagicMock()
+        cm.__aenter__ = AsyncMock(return_value=failing_iter(events) if fail else _aiter(events))
+        cm.__aexit__ = AsyncMock(return_value=False)
+        return cm
+
+    client.client.messages.stream = MagicMock(side_effect=[stream_cm([], True), stream_cm([text_event], False)])
+    events = [e async for e in client.stream_generate([Message(role="user", content="hi")])]
+    assert client.client.messages.stream.call_count == 2
+    assert "".join(e["content"] for e in events if e["type"] == "content") == "Hi"
+
+    client.client.messages.stream = MagicMock(side_effect=[stream_cm([text_event], True), stream_cm([text_event], False)])
+    with pytest.raises(ConnectionError):
+        _ = [e async for e in client.stream_generate([Message(role="user", content="hi")])]
+    assert client.client.messages.stream.call_count == 1
+
+
+async def test_text_events_are_coalesced_in_order():
+    """Test text deltas are merged up to the size limit and flushed before other events"""
+    events_in = (
+        [{"type": "thinking", "content": "t"} for _ in range(3)]
+        + [{"type": "content", "content": "ab"} for _ in range(6)]
+        + [{"type": "tool_call_start", "tool_call_id": "1", "tool_name": "bash"}, {"type": "content", "content": "z"}]
+    )
+
+    events = [e async for e in coalesce_text_events(_aiter(events_in), max_chars=4, max_ms=10_000)]
+
+    assert events == [
+        {"type": "thinking", "content": "t"},
+        {"type": "thinking", "content": "tt"},
+        {"type": "content", "content": "abab"},
+        {"type": "content", "content": "abab"},
+        {"type": "content", "content": "abab"},
+        {"type": "tool_call_start", "tool_call_id": "1", "tool_name": "bash"},
+        {"type": "content", "content": "z"},
+    ]
+    unmerged = [e async for e in coalesce_text_events(_aiter(events_in), max_chars=1)]
+    assert unmerged == events_in
+
+
+async def test_held_text_is_flushed_when_upstream_stalls():
+    """Test pending text is yielded at the deadline, not when the next delta finally arrives"""
+
+    async def stalling_source():
+        yield {"type": "content", "content": "a"}
+        yield {"type": "content", "content": "b"}
+        await asyncio.sleep(0.5)
+        yield {"type": "content", "content": "c"}
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    received = []
+    async for event in coalesce_text_events(stalling_source(), max_chars=64, max_ms=20):
+        received.append((event["content"], loop.time() - start))
+
+    assert [content for content, _ in received] == ["a", "b", "c"]
+    # "b" went out on the timer, well before the stalled "c"
+    assert received[1][1] < 0.25
+
+
+async def test_coalesced_stream_passes_on_source_errors():
+    """Test an error raised by the source reaches the consumer"""
+
+    async def failing_source():
+        yield {"type": "content", "content": "a"}
+        yield {"type": "content", "content": "b"}
+        raise ConnectionError("connection reset")
+
+    received = []
+    with pytest.raises(ConnectionError):
+        async for event in coalesce_text_events(failing_source(), max_chars=64, max_ms=10_000):
+            received.append(event["content"])
+    assert received == ["a"]
@@ -0,0 +1,251 @@
+"""
+Response cache tests - Testing response caches and in-flight request deduplication in OpenAIClient
+"""
+
+import asyncio
+import importlib
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from mini_agent.llm import OpenAIClient
+from mini_agent.llm.response_cache import InMemoryLRU, RedisBackend
+from mini_agent.llm.semantic_cache import SemanticCache
+from mini_agent.retry import RetryConfig
+from mini_agent.utils import json_utils
+from mini_agent.schema import FunctionCall, LLMResponse, Message, ToolCall
+
+
+def letter_embed(text: str) -> list[float]:
+    """Stand-in embedding: letter counts, so similar wording gives similar vectors"""
+    text = text.lower()
+    return [float(text.count(c)) for c in "abcdefghijklmnopqrstuvwxyz"]
+
+
+def _prompt(text: str) -> list[Message]:
+    return [Message(role="system", content="You are helpful"), Message(role="user", content=text)]
+
+
+def _openai_client(**kwargs) -> OpenAIClient:
+    """OpenAIClient whose SDK call returns a fixed "Paris" completion"""
+    client = OpenAIClient(api_key="test-key", api_base="http://localhost:1", retry_config=RetryConfig(enabled=False), **kwargs)
+    message = SimpleNamespace(content="Paris", tool_calls=None)
+    api_response = SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=None)
+    client.client = MagicMock()
+    client.client.chat.completions.create = AsyncMock(return_value=api_response)
+    return client
+
+
+def test_cache_backends_import_without_numpy(monkeypatch):
+    """Test the exact-match backends don't need the semantic-cache extra"""
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    monkeypatch.delitem(sys.modules, "mini_agent.llm.response_cache")
+    module = importlib.import_module("mini_agent.llm.response_cache")
+    # A fresh import, not the module loaded above
+    assert module.InMemoryLRU is not InMemoryLRU
+
+
+async def test_in_memory_lru_evicts_and_expires():
+    """Test the least recently used key is dropped when full, and entries expire after ttl"""
+    cache = InMemoryLRU(max_entries=2)
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    assert await cache.get("a") == "1"
+    await cache.set("c", "3")
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1"
+
+    short = InMemoryLRU(ttl=0.01)
+    await short.set("a", "1")
+    await asyncio.sleep(0.02)
+    assert await short.get("a") is None
+    assert len(short) == 0
+
+
+async def test_redis_backend_prefixes_keys_and_sets_expiry():
+    """Test values go to Redis under the prefix with the ttl as expiry"""
+    redis = MagicMock()
+    redis.set = AsyncMock()
+    redis.get = AsyncMock(return_value=b'{"content": "hi"}')
+    backend = RedisBackend(client=redis, ttl=60, prefix="test:")
+
+    await backend.set("key", "value")
+    redis.set.assert_awaited_once_with("test:key", "value", ex=60)
+    assert await backend.get("key") == '{"content": "hi"}'
+    redis.get.assert_awaited_once_with("test:key")
+
+
+async def test_openai_generate_uses_response_cache():
+    """Test an identical request is answered from the cache, a different one is not"""
+    client = _openai_client(response_cache=InMemoryLRU())
+
+    first = await client.generate(_prompt("What is the capital of France?"))
+    second = await client.generate(_prompt("What is the capital of France?"))
+    assert first == second
+    assert client.client.chat.completions.create.await_count == 1
+
+    await client.generate(_prompt("What is the capital of France?"), enable_deep_think=True)
+    await client.generate(_prompt("What is the capital of Spain?"))
+    assert client.client.chat.completions.create.await_count == 3
+
+
+async def test_response_cache_shared_with_and_without_orjson(monkeypatch):
+    """Test float tool-call arguments give the same key whether or not orjson is installed"""
+
+    def history() -> list[Message]:
+        call = ToolCall(id="1", type="function", function=FunctionCall(name="scale", arguments={"x": 0.00001, "y": 1e16}))
+        return _prompt("Scale it") + [
+            Message(role="assistant", content="", tool_calls=[call]),
+            Message(role="tool", content="done", tool_call_id="1", name="scale"),
+            Message(role="user", content="And now?"),
+        ]
+
+    shared = InMemoryLRU()
+    with_orjson = _openai_client(response_cache=shared)
+    await with_orjson.generate(history())
+
+    monkeypatch.setattr(json_utils, "orjson", None)
+    without_orjson = _openai_client(response_cache=shared)
+    assert (await without_orjson.generate(history())).content == "Paris"
+    assert without_orjson.client.chat.completions.create.await_count == 0
+
+
+def test_semantic_cache_hit_and_miss():
+    """Test a near-identical prompt hits and an unrelated one misses"""
+    cache = SemanticCache(embed=letter_embed, threshold=0.95)
+    response = LLMResponse(content="Paris", finish_reason="stop")
+    cache.store(_prompt("What is the capital of France?"), response)
+
+    assert cache.lookup(_prompt("what is the capital of france")) is response
+    assert cache.lookup(_prompt("zzz qqq xxx")) is None
+    # Not ending in a user message: nothing to compare
+    with_reply = _prompt("What is the capital of France?") + [Message(role="assistant", content="Paris")]
+    assert cache.lookup(with_reply) is None
+
+
+def test_semantic_cache_requires_identical_context():
+    """Test earlier turns, assistant and tool messages included, must match exactly"""
+    cache = SemanticCache(embed=letter_embed, threshold=0.95)
+    earlier = [
+        Message(role="user", content="List the files"),
+        Message(role="assistant", content="", tool_calls=[
+            ToolCall(id="1", type="function", function=FunctionCall(name="bash", arguments={"cmd": "ls"})),
+        ]),
+        Message(role="tool", content="a.txt", tool_call_id="1", name="bash"),
+    ]
+    question = Message(role="user", content="Which one is largest?")
+    response = LLMResponse(content="a.txt", finish_reason="stop")
+    cache.store(_prompt("x")[:1] + earlier + [question], response)
+
+    assert cache.lookup(_prompt("x")[:1] + earlier + [question]) is response
+    other_result = earlier[:2] + [Message(role="tool", content="b.txt", tool_call_id="1", name="bash")]
+    assert cache.lookup(_prompt("x")[:1] + other_result + [question]) is None
+    assert cache.lookup([Message(role="system", content="Other prompt")] + earlier + [question]) is None
+
+
+def test_semantic_cache_skips_text_beyond_embedding_window():
+    """Test a final message the model can't see whole is neither looked up nor stored"""
+    cache = SemanticCache(embed=letter_embed, fits_window=lambda text: len(text) <= 40)
+    long_prompt = _prompt("Summarize: " + "abc " * 20)
+    cache.store(long_prompt, LLMResponse(content="summary", finish_reason="stop"))
+    assert len(cache) == 0
+    assert cache.lookup(long_prompt) is None
+
+
+def test_semantic_cache_evicts_least_recently_used():
+    """Test the entry unused for longest is dropped when the cache is full"""
+    cache = SemanticCache(embed=letter_embed, threshold=0.99, max_entries=2)
+    cache.store(_prompt("aaaa"), LLMResponse(content="a", finish_reason="stop"))
+    cache.store(_prompt("bbbb"), LLMResponse(content="b", finish_reason="stop"))
+    assert cache.lookup(_prompt("aaaa")).content == "a"
+
+    cache.store(_prompt("cccc"), LLMResponse(content="c", finish_reason="stop"))
+    assert len(cache) == 2
+    assert cache.lookup(_prompt("bbbb")) is None
+    assert cache.lookup(_prompt("aaaa")).content == "a"
+
+
+def test_semantic_cache_persists(tmp_path):
+    """Test entries saved to path are loaded by a new cache"""
+    path = tmp_path / "cache" / "sem_cache.npz"
+    cache = SemanticCache(embed=letter_embed, path=path)
+    cache.store(_prompt("hello world"), LLMResponse(content="hi", finish_reason="stop"))
+
+    reloaded = SemanticCache(embed=letter_embed, path=path)
+    assert len(reloaded) == 1
+    assert reloaded.lookup(_prompt("hello world")).content == "hi"
+
+
+async def test_openai_generate_uses_semantic_cache():
+    """Test a cache hit skips the API call, and tool requests bypass the cache"""
+    client = _openai_client(semantic_cache=SemanticCache(embed=letter_embed))
+
+    first = await client.generate(_prompt("What is the capital of France?"))
+    second = await client.generate(_prompt("What is the capital of France?"))
+    assert first.content == second.content == "Paris"
+    assert client.client.chat.completions.create.await_count == 1
+
+    tool = {"name": "bash", "description": "Run", "input_schema": {"type": "object", "properties": {}}}
+    await client.generate(_prompt("What is the capital of France?"), tools=[tool])
+    await client.generate(_prompt("What is the capital of France?"), enable_deep_think=True)
+    assert client.client.chat.completions.create.await_count == 3
+
+
+async def test_openai_concurrent_identical_requests_share_one_call(monkeypatch):
+    """Test identical in-flight requests are merged when enabled, deep-think ones are not"""
+    client = _openai_client(deduplicate_requests=True)
+    api_response = client.client.chat.completions.create.return_value
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.05)
+        return api_response
+
+    client.client.chat.completions.create = AsyncMock(side_effect=slow_create)
+    results = await asyncio.gather(*(client.generate(_prompt("hi")) for _ in range(3)))
+    assert [r.content for r in results] == ["Paris"] * 3
+    assert client.client.chat.completions.create.await_count == 1
+    assert client._inflight == {}
+
+    await asyncio.gather(*(client.generate(_prompt("hi"), enable_deep_think=True) for _ in range(2)))
+    assert client.client.chat.completions.create.await_count == 3
+
+    # Off by default, and then the history isn't hashed at all
+    client = _openai_client()
+    client.client.chat.completions.create = AsyncMock(side_effect=slow_create)
+    monkeypatch.setattr(client, "_cache_key", MagicMock(side_effect=AssertionError("hashed")))
+    await asyncio.gather(*(client.generate(_prompt("hi")) for _ in range(2)))
+    assert client.client.chat.completions.create.await_count == 2
+
+
+async def test_openai_deduplicated_request_failures_and_cancellation():
+    """Test waiters see the shared request's error, and reissue it if its caller is cancelled"""
+    client = _openai_client(deduplicate_requests=True)
+    api_response = client.client.chat.completions.create.return_value
+
+    async def failing_create(**kwargs):
+        await asyncio.sleep(0.05)
+        raise ConnectionError("connection reset")
+
+    client.client.chat.completions.create = AsyncMock(side_effect=failing_create)
+    results = await asyncio.gather(*(client.generate(_prompt("hi")) for _ in range(2)), return_exceptions=True)
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert client.client.chat.completions.create.await_count == 1
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.05)
+        return api_response
+
+    client.client.chat.completions.create = AsyncMock(side_effect=slow_create)
+    owner = asyncio.create_task(client.generate(_prompt("hi")))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(client.generate(_prompt("hi"))) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    owner.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+    # The waiters reissue the request once between them, not once each
+    assert [(await waiter).content for waiter in waiters] == ["Paris", "Paris"]
+    assert client.client.chat.completions.create.await_count == 2
+    assert client._inflight == {}
@@ -16,6 +16,12 @@ from mini_agent.tools.file_tools import ReadTool, WriteTool
 from mini_agent.tools.note_tool import RecallNoteTool, SessionNoteTool
 
 
+@pytest.fixture(autouse=True)
+def run_logs_in_tmp(tmp_path, monkeypatch):
+    """AgentLogger writes run logs under the working directory; keep them out of the repo"""
+    monkeypatch.chdir(tmp_path)
+
+
 @pytest.fixture
 def mock_llm_client():
     """Create mock LLM client"""
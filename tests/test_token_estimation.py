@@ -0,0 +1,228 @@
+"""
+Token estimation tests - Testing incremental token accounting on Agent
+"""
+
+import asyncio
+import json
+import tempfile
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from mini_agent import LLMClient
+from mini_agent.agent import Agent, _approx_json_chars
+from mini_agent.schema import FunctionCall, LLMResponse, Message, ToolCall
+
+
+@pytest.fixture(autouse=True)
+def run_logs_in_tmp(tmp_path, monkeypatch):
+    """AgentLogger writes run logs under the working directory; keep them out of the repo"""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def agent():
+    """Create agent with mock LLM client"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Agent(
+            llm_client=MagicMock(spec=LLMClient),
+            system_prompt="You are an intelligent assistant",
+            tools=[],
+            workspace_dir=tmpdir,
+        )
+
+
+def _fresh_count(messages: list[Message]) -> int:
+    """Token count computed from scratch by a new agent state"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        other = Agent(llm_client=MagicMock(spec=LLMClient), system_prompt="x", tools=[], workspace_dir=tmpdir)
+    other.messages = list(messages)
+    return other._estimate_tokens()
+
+
+def test_incremental_count_matches_full_count(agent):
+    """Test appending messages updates the count like a full re-scan"""
+    agent.add_user_message("Hello")
+    first = agent._estimate_tokens()
+    assert first == _fresh_count(agent.messages)
+
+    agent.messages.append(
+        Message(
+            role="assistant",
+            content="Reading the file",
+            thinking="Need to look at the file first",
+            tool_calls=[ToolCall(id="1", type="function", function=FunctionCall(name="read_file", arguments={"path": "a.txt"}))],
+        )
+    )
+    agent.messages.append(Message(role="tool", content="file contents", tool_call_id="1", name="read_file"))
+    second = agent._estimate_tokens()
+    assert second > first
+    assert second == _fresh_count(agent.messages)
+
+
+def test_count_rebuilt_after_history_rewrite(agent):
+    """Test replacing or truncating history resets the running count"""
+    for i in range(5):
+        agent.add_user_message(f"Message {i}")
+    long_count = agent._estimate_tokens()
+
+    # Replace the list (e.g. /clear in the CLI)
+    agent.messages = [agent.messages[0]]
+    assert agent._estimate_tokens() == _fresh_count(agent.messages)
+    assert agent._estimate_tokens() < long_count
+
+    # Truncate in place and append something new
+    for i in range(3):
+        agent.add_user_message(f"Again {i}")
+    agent._estimate_tokens()
+    del agent.messages[1:]
+    agent.add_user_message("Replacement")
+    assert agent._estimate_tokens() == _fresh_count(agent.messages)
+
+
+def test_text_blocks_counted_like_plain_content(agent):
+    """Test list content is counted by the text the model sees, not the dict repr"""
+    plain = _fresh_count([Message(role="user", content="Hello there, how are you?")])
+    blocks = _fresh_count([Message(role="user", content=[{"type": "text", "text": "Hello there, how are you?"}])])
+    assert blocks == plain
+
+
+def test_fallback_block_size_matches_compact_json(agent):
+    """Test structured blocks are sized like their compact JSON without serializing them"""
+    payloads = [{"path": "a.txt", "lines": [1, 2, 3], "flags": {"force": True, "mode": None}}, [], {}, "text", 1.5]
+    for payload in payloads:
+        assert _approx_json_chars(payload) == len(json.dumps(payload, separators=(",", ":")))
+
+    block = {"type": "tool_use", "id": "t1", "name": "read_file", "input": payloads[0]}
+    assert Agent._block_chars(block) == len(Agent._block_text(block))
+
+
+async def test_summary_uses_secondary_client():
+    """Test round summaries go to summary_llm_client when one is given"""
+    summary_llm = MagicMock(spec=LLMClient)
+    summary_llm.generate = AsyncMock(return_value=LLMResponse(content="short summary", finish_reason="stop"))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = Agent(
+            llm_client=MagicMock(spec=LLMClient),
+            system_prompt="x",
+            tools=[],
+            workspace_dir=tmpdir,
+            summary_llm_client=summary_llm,
+        )
+    summary = await agent._create_summary([Message(role="assistant", content="did things")], 1)
+
+    assert summary == "short summary"
+    summary_llm.generate.assert_awaited_once()
+    agent.llm.generate.assert_not_called()
+
+
+async def test_summaries_keep_round_order(agent):
+    """Test concurrently generated round summaries are placed after their own user message"""
+
+    async def fake_generate(messages, **kwargs):
+        prompt = messages[-1].content
+        # Finish later rounds first to exercise reordering
+        await asyncio.sleep(0.05 if "Round 1" in prompt else 0.0)
+        round_label = "round 1" if "Round 1" in prompt else "round 2"
+        return LLMResponse(content=f"summary of {round_label}", finish_reason="stop")
+
+    agent.llm.generate = AsyncMock(side_effect=fake_generate)
+    agent.token_limit = 1
+    agent.add_user_message("first task")
+    agent.messages.append(Message(role="assistant", content="working on first"))
+    agent.add_user_message("second task")
+    agent.messages.append(Message(role="assistant", content="working on second"))
+
+    await agent._summarize_messages()
+
+    assert [m.content for m in agent.messages[1:]] == [
+        "first task",
+        "[Assistant Execution Summary]\n\nsummary of round 1",
+        "second task",
+        "[Assistant Execution Summary]\n\nsummary of round 2",
+    ]
+
+
+class CharEncoding:
+    """Stand-in tiktoken encoding: one token per character, records what it encodes"""
+
+    def __init__(self):
+        self.encoded: list[str] = []
+
+    def encode_ordinary_batch(self, texts, num_threads=8):
+        self.encoded.extend(texts)
+        return [list(text) for text in texts]
+
+
+def test_cached_messages_are_not_re_encoded(agent, monkeypatch):
+    """Test only unseen messages are tokenized, including after history rewrites"""
+    encoding = CharEncoding()
+    monkeypatch.setattr("mini_agent.agent._get_encoding", lambda: encoding)
+
+    agent.add_user_message("first")
+    agent.add_user_message("second")
+    assert agent._estimate_tokens() == len(agent.system_prompt) + len("first") + len("second") + 3 * 4
+
+    encoding.encoded.clear()
+    agent.add_user_message("third")
+    agent._estimate_tokens()
+    assert encoding.encoded == ["third"]
+
+    # Rewrite history the way summarization does: surviving messages keep their counts
+    encoding.encoded.clear()
+    agent.messages = [agent.messages[0], agent.messages[1], Message(role="user", content="summary")]
+    assert agent._estimate_tokens() == len(agent.system_prompt) + len("first") + len("summary") + 3 * 4
+    assert encoding.encoded == ["summary"]
+    assert len(agent._token_cache) == 3
+
+
+async def test_tokenizer_skipped_when_far_below_limit(agent, monkeypatch):
+    """Test the summarization check only tokenizes once the byte-size bound nears the limit"""
+    encoding = CharEncoding()
+    monkeypatch.setattr("mini_agent.agent._get_encoding", lambda: encoding)
+
+    agent.add_user_message("你好，世界")
+    agent.token_limit = 10_000
+    await agent._summarize_messages()
+    assert encoding.encoded == []
+
+    # Bound over the limit: exact counts are computed, which stay under it
+    bound = agent._token_upper_bound()
+    agent.token_limit = bound - 1
+    await agent._summarize_messages()
+    assert "你好，世界" in encoding.encoded
+    assert agent._estimate_tokens() <= agent.token_limit
+    assert agent._token_upper_bound() == agent._estimate_tokens() < bound
+
+
+async def test_summary_concurrency_is_bounded():
+    """Test no more than summary_concurrency round summaries are in flight at once"""
+    in_flight = 0
+    peak = 0
+
+    async def fake_generate(messages, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return LLMResponse(content="summary", finish_reason="stop")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = Agent(
+            llm_client=MagicMock(spec=LLMClient),
+            system_prompt="x",
+            tools=[],
+            workspace_dir=tmpdir,
+            token_limit=1,
+            summary_concurrency=2,
+        )
+    agent.llm.generate = AsyncMock(side_effect=fake_generate)
+    for i in range(6):
+        agent.add_user_message(f"task {i}")
+        agent.messages.append(Message(role="assistant", content=f"working on {i}"))
+
+    await agent._summarize_messages()
+
+    assert agent.llm.generate.await_count == 6
+    assert peak == 2
@@ -0,0 +1,264 @@
+"""
+Tool execution tests - Testing how Agent dispatches a step's tool calls
+"""
+
+import asyncio
+import tempfile
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from mini_agent import LLMClient
+from mini_agent.agent import Agent, _truncate_for_display
+from mini_agent.schema import FunctionCall, LLMResponse, ToolCall
+from mini_agent.tools.base import Tool, ToolResult
+
+
+@pytest.fixture(autouse=True)
+def run_logs_in_tmp(tmp_path, monkeypatch):
+    """AgentLogger writes run logs under the working directory; keep them out of the repo"""
+    monkeypatch.chdir(tmp_path)
+
+
+class SleepTool(Tool):
+    """Tool that sleeps, recording when it started and finished"""
+
+    def __init__(self, name: str, delay: float, events: list, serial: bool = False):
+        self._name = name
+        self.delay = delay
+        self.events = events
+        self.serial = serial
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return "Sleep for a while"
+
+    @property
+    def parameters(self) -> dict:
+        return {"type": "object", "properties": {}}
+
+    async def execute(self, **kwargs) -> ToolResult:
+        self.events.append(("start", self._name))
+        await asyncio.sleep(self.delay)
+        self.events.append(("end", self._name))
+        return ToolResult(success=True, content=f"{self._name} done")
+
+
+def _make_agent(tools: list[Tool], tmpdir: str) -> Agent:
+    return Agent(llm_client=MagicMock(spec=LLMClient), system_prompt="You are a test agent", tools=tools, workspace_dir=tmpdir)
+
+
+async def test_independent_tools_run_concurrently():
+    """Test non-serial tools in one step overlap and results keep call order"""
+    events = []
+    tools = [SleepTool("slow", 0.2, events), SleepTool("fast", 0.05, events)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = _make_agent(tools, tmpdir)
+        results = await agent._execute_tool_calls([("slow", {}), ("fast", {}), ("missing", {})])
+
+    assert [r.content for r, _ in results[:2]] == ["slow done", "fast done"]
+    assert not results[2][0].success
+    assert "Unknown tool" in results[2][0].error
+    # Both started before either finished
+    assert events[:2] == [("start", "slow"), ("start", "fast")]
+
+
+async def test_serial_tool_waits_for_earlier_calls():
+    """Test a serial tool only starts once the calls before it have finished"""
+    events = []
+    tools = [SleepTool("read", 0.05, events), SleepTool("write", 0.01, events, serial=True), SleepTool("after", 0.01, events)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = _make_agent(tools, tmpdir)
+        await agent._execute_tool_calls([("read", {}), ("write", {}), ("after", {})])
+
+    assert events == [
+        ("start", "read"),
+        ("end", "read"),
+        ("start", "write"),
+        ("end", "write"),
+        ("start", "after"),
+        ("end", "after"),
+    ]
+
+
+async def test_run_appends_tool_messages_in_call_order():
+    """Test run() records tool results in the order the model requested them"""
+    events = []
+    tools = [SleepTool("slow", 0.1, events), SleepTool("fast", 0.01, events)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = _make_agent(tools, tmpdir)
+        agent.llm.generate = AsyncMock(
+            side_effect=[
+                LLMResponse(
+                    content="",
+                    tool_calls=[
+                        ToolCall(id="1", type="function", function=FunctionCall(name="slow", arguments={})),
+                        ToolCall(id="2", type="function", function=FunctionCall(name="fast", arguments={})),
+                    ],
+                    finish_reason="tool_calls",
+                ),
+                LLMResponse(content="All done", finish_reason="stop"),
+            ]
+        )
+        result = await agent.run("go")
+
+    assert result == "All done"
+    tool_msgs = [m for m in agent.messages if m.role == "tool"]
+    assert [(m.tool_call_id, m.content) for m in tool_msgs] == [("1", "slow done"), ("2", "fast done")]
+
+
+async def test_cancel_between_serial_tools():
+    """Test tools after a serial call are skipped once the run is cancelled"""
+    events = []
+    cancel_event = asyncio.Event()
+
+    class CancellingTool(SleepTool):
+        async def execute(self, **kwargs) -> ToolResult:
+            result = await super().execute(**kwargs)
+            cancel_event.set()
+            return result
+
+    tools = [CancellingTool("write", 0.01, events, serial=True), SleepTool("after", 0.01, events)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = _make_agent(tools, tmpdir)
+        agent.cancel_event = cancel_event
+        agent._bind_cancel_check()
+        results = await agent._execute_tool_calls([("write", {}), ("after", {})])
+
+    assert len(results) == 1
+    assert ("start", "after") not in events
+
+
+async def test_cancel_aborts_running_tools():
+    """Test cancelling mid-group stops in-flight tools instead of waiting for them"""
+    events = []
+    tools = [SleepTool("fast", 0.01, events), SleepTool("slow", 5, events)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = _make_agent(tools, tmpdir)
+        agent.cancel_event = asyncio.Event()
+        agent._bind_cancel_check()
+        asyncio.get_running_loop().call_later(0.05, agent.cancel_event.set)
+        results = await asyncio.wait_for(agent._execute_tool_calls([("fast", {}), ("slow", {})]), timeout=1)
+
+    assert [r.content for r, _ in results] == ["fast done"]
+    assert ("end", "slow") not in events
+
+
+async def test_run_cancelled_during_llm_call():
+    """Test run() returns promptly when cancelled while waiting on the model"""
+
+    async def slow_generate(**kwargs):
+        await asyncio.sleep(5)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = _make_agent([], tmpdir)
+        agent.llm.generate = slow_generate
+        cancel_event = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.05, cancel_event.set)
+        result = await asyncio.wait_for(agent.run("go", cancel_event=cancel_event), timeout=1)
+
+    assert result == "Task cancelled by user."
+
+
+def test_tool_argument_display_truncation():
+    """Test long argument and result values are shortened without stringifying them whole"""
+    assert _truncate_for_display("short") == "short"
+    assert _truncate_for_display("x" * 500) == "x" * 200 + "..."
+    assert _truncate_for_display(42) == 42
+    assert _truncate_for_display({"path": "a.txt"}) == {"path": "a.txt"}
+    assert _truncate_for_display(list(range(100_000))) == "[0, 1, 2, 3, 4, 5, 6, 7, 8, 9, ...]"
+    assert len(_truncate_for_display({"content": "y" * 10_000})) <= 203
+    assert _truncate_for_display(b"z" * 500) == "z" * 200 + "..."
+    assert _truncate_for_display("r" * 400, 300, "~") == "r" * 300 + "~"
+
+
+async def test_run_stream_reports_results_as_tools_finish():
+    """Test tool_result events arrive in completion order while history keeps call order"""
+    events = []
+    tools = [SleepTool("slow", 0.1, events), SleepTool("fast", 0.01, events)]
+    tool_calls = [
+        ToolCall(id="1", type="function", function=FunctionCall(name="slow", arguments={})),
+        ToolCall(id="2", type="function", function=FunctionCall(name="fast", arguments={})),
+    ]
+    responses = [
+        [{"type": "done", "response": LLMResponse(content="", tool_calls=tool_calls, finish_reason="tool_use")}],
+        [
+            {"type": "content", "content": "All done"},
+            {"type": "done", "response": LLMResponse(content="All done", finish_reason="end_turn")},
+        ],
+    ]
+
+    async def fake_stream_generate(**kwargs):
+        for chunk in responses.pop(0):
+            yield chunk
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = _make_agent(tools, tmpdir)
+        agent.llm.stream_generate = fake_stream_generate
+        stream_events = [event async for event in agent.run_stream("go")]
+
+    result_ids = [e["tool_call_id"] for e in stream_events if e["type"] == "tool_result"]
+    assert result_ids == ["2", "1"]
+    assert stream_events[-1]["type"] == "done"
+    tool_msgs = [m for m in agent.messages if m.role == "tool"]
+    assert [m.tool_call_id for m in tool_msgs] == ["1", "2"]
+
+
+async def test_run_stream_cancelled_during_llm_stream():
+    """Test run_stream closes an in-flight LLM stream as soon as the run is cancelled"""
+    closed = asyncio.Event()
+
+    async def stalling_stream_generate(**kwargs):
+        try:
+            yield {"type": "content", "content": "Working"}
+            await asyncio.sleep(5)
+            yield {"type": "content", "content": "never sent"}
+        finally:
+            closed.set()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = _make_agent([], tmpdir)
+        agent.llm.stream_generate = stalling_stream_generate
+        cancel_event = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.05, cancel_event.set)
+
+        async def collect():
+            return [event async for event in agent.run_stream("go", cancel_event=cancel_event)]
+
+        stream_events = await asyncio.wait_for(collect(), timeout=1)
+
+    assert closed.is_set()
+    assert [e["content"] for e in stream_events if e["type"] == "content"] == ["Working"]
+    assert stream_events[-1] == {"type": "error", "content": "Task cancelled by user."}
+
+
+async def test_run_stream_cancelled_between_chunks():
+    """Test a cancel set while the caller handles a chunk stops the stream without cancelling the caller"""
+    closed = asyncio.Event()
+
+    async def endless_stream_generate(**kwargs):
+        try:
+            while True:
+                yield {"type": "content", "content": "more"}
+                await asyncio.sleep(0)
+        finally:
+            closed.set()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent = _make_agent([], tmpdir)
+        agent.llm.stream_generate = endless_stream_generate
+        cancel_event = asyncio.Event()
+        stream_events = []
+        async for event in agent.run_stream("go", cancel_event=cancel_event):
+            stream_events.append(event)
+            cancel_event.set()
+        # The calling task itself was not cancelled
+        await asyncio.sleep(0)
+
+    assert closed.is_set()
+    assert [e["type"] for e in stream_events] == ["assistant_start", "content", "error"]
+
@@ -242,6 +242,15 @@ def test_tool_schema_consistency():
     assert anthropic_schema["input_schema"] == openai_schema["function"]["parameters"]
 
 
+def test_tool_schemas_built_once():
+    """Test schemas are built on first use and reused per tool instance."""
+    tool = MockCalculatorTool()
+
+    assert tool.to_schema() is tool.to_schema()
+    assert tool.to_openai_schema() is tool.to_openai_schema()
+    assert MockCalculatorTool().to_schema() is not tool.to_schema()
+
+
 @pytest.mark.asyncio
 async def test_tool_execute():
     """Test that tools can be executed."""